@@ -0,0 +1,227 @@
+"""
+arena.py  –  engine-vs-engine tournaments on a process pool
+• engines are given as specs, e.g. "minimax:depth=8" or "mcts:iterations=5000"
+• every random opening is played twice, once with each engine moving first
+• fixed depth/node/iteration budgets give reproducible games, time=S a per-move clock
+• Elo with a 95% confidence interval and an SPRT stop rule
+• --board plays a variant: another board size and connect length
+
+    python arena.py mcts:iterations=3000 minimax:depth=7 --games 200
+    python arena.py mcts:time=0.2,tactical=1 mcts:time=0.2 --sprt 0 20
+    python arena.py mcts:time=0.5 minimax:time=0.5 --board 8x9x5
+
+Spec keys:
+    minimax   depth=N  nodes=N  time=S  solver=EMPTIES  book=1
+    mcts      iterations=N  time=S  tactical=1  rollouts=N  solver=EMPTIES  book=1
+              rave=K  bias=B  c=C   (RAVE equivalence k or MSE-schedule bias, UCB constant)
+Without a budget key an engine gets time=0.1.  The book and the solver
+are only used on the standard 6x7 board.
+"""
+
+from __future__ import annotations
+import math, random, sys, time
+import multiprocessing as mp
+
+from geometry import STANDARD, parse_geometry
+from monte import BitboardGame
+
+# the keys each engine understands; anything else is a typo or the other
+# engine's budget, and would leave the engine without the intended limit
+ENGINE_KEYS = {
+    "minimax": ("depth", "nodes", "time", "solver", "book"),
+    "mcts": ("iterations", "time", "tactical", "rollouts", "solver", "book", "rave", "bias", "c"),
+}
+ENGINES = tuple(ENGINE_KEYS)
+DEFAULT_TIME = 0.1
+FLOAT_KEYS = ("time", "bias", "c")
+
+
+def parse_spec(text):
+    """("minimax" | "mcts", {key: value}) from an engine spec string."""
+    name, _, rest = text.partition(":")
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine {name!r}, expected one of {', '.join(ENGINES)}")
+    params = {}
+    for item in filter(None, rest.split(",")):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"bad engine option {item!r}, expected key=value")
+        if key not in ENGINE_KEYS[name]:
+            raise ValueError(f"unknown {name} option {key!r}, expected one of {', '.join(ENGINE_KEYS[name])}")
+        params[key] = float(value) if key in FLOAT_KEYS else int(value)
+    return name, params
+
+
+def make_agent(spec, seed, geo = STANDARD):
+    """(agent, game) for a spec; game is an empty board of the type the agent searches."""
+    name, p = parse_spec(spec)
+    book = None
+    if p.get("book"):
+        from book import load_book
+        book = load_book()
+    fixed = "depth" in p or "nodes" in p or "iterations" in p
+    time_limit = p.get("time", None if fixed else DEFAULT_TIME)
+    if name == "minimax":
+        from connect_4_playing_ai import Position, AlphaBetaAgent, MAX_PLY
+        agent = AlphaBetaAgent(time_limit=time_limit, max_depth=p.get("depth", MAX_PLY),
+                               node_budget=p.get("nodes"), book=book,
+                               solver_threshold=p.get("solver", 18))
+        return agent, Position(geo)
+    from monte import MCTSAgent, EXPLORATION_C
+    agent = MCTSAgent(time_limit=time_limit, max_iterations=p.get("iterations"),
+                      tactical=bool(p.get("tactical")), leaf_rollouts=p.get("rollouts", 1),
+                      rng=random.Random(seed), book=book, solver_threshold=p.get("solver", 18),
+                      rave=p.get("rave"), rave_bias=p.get("bias"), exploration=p.get("c", EXPLORATION_C))
+    return agent, BitboardGame(geo)
+
+
+def random_opening(rng, plies, geo = STANDARD):
+    """plies random moves that neither end the game nor leave a win in one."""
+    while True:
+        g = BitboardGame(geo)
+        for _ in range(plies):
+            g.play(rng.choice(g.legal_moves()))
+        me, opp = g.bb[g.side_to_move], g.bb[g.side_to_move ^ 1]
+        mask = me | opp
+        if not g.terminal()[0] and not geo.winning_cells(me, mask) & geo.playable(mask):
+            return g.moves
+
+
+def play_game(spec_a, spec_b, opening, a_first, seed, geo = STANDARD):
+    """Score for engine a (1, 0.5 or 0) in one game from opening."""
+    a = make_agent(spec_a, seed, geo)
+    b = make_agent(spec_b, seed + 1, geo)
+    # a_first: a makes the first move after the opening, so it plays the
+    # side to move there; players and winners are both indexed by side
+    a_side = (len(opening) & 1) ^ (not a_first)
+    players = [b, a] if a_side else [a, b]
+    ref = BitboardGame(geo)
+    for col in opening:
+        ref.play(col)
+        for _, g in players:
+            g.play(col)
+    while True:
+        agent, g = players[ref.side_to_move]
+        col = agent.search(g)
+        ref.play(col)
+        for _, g in players:
+            g.play(col)
+        over, winner = ref.terminal()
+        if over:
+            break
+    if winner is None:
+        return 0.5
+    return 1.0 if winner == a_side else 0.0
+
+
+def _play(task):
+    return task[0], play_game(*task[1:])
+
+
+def elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_interval(w, d, l, z = 1.96):
+    """(elo, low, high) from a trinomial W/D/L count."""
+    n = w + d + l
+    s = (w + 0.5 * d) / n
+    # a one-sided match counts half a win and half a loss more for the
+    # variance, which would otherwise be zero
+    vw, vl = (w, l) if w and l else (w + 0.5, l + 0.5)
+    vs = (vw + 0.5 * d) / (vw + d + vl)
+    var = (vw * (1 - vs) ** 2 + d * (0.5 - vs) ** 2 + vl * vs ** 2) / (vw + d + vl)
+    se = math.sqrt(var / n)
+    return elo(s), elo(s - z * se), elo(s + z * se)
+
+
+def sprt_llr(w, d, l, elo0, elo1):
+    """Log-likelihood ratio of H1 (elo1) against H0 (elo0).
+
+    Both hypotheses keep the observed draw rate, so only wins and losses
+    carry evidence.
+    """
+    n = w + d + l
+    if not n:
+        return 0.0
+    half_draw = d / n / 2
+    llr = 0.0
+    s0 = 1 / (1 + 10 ** (-elo0 / 400))
+    s1 = 1 / (1 + 10 ** (-elo1 / 400))
+    for count, p0, p1 in ((w, s0 - half_draw, s1 - half_draw),
+                          (l, 1 - s0 - half_draw, 1 - s1 - half_draw)):
+        if count:
+            llr += count * math.log(max(p1, 1e-9) / max(p0, 1e-9))
+    return llr
+
+
+def run(spec_a, spec_b, games = 100, plies = 4, workers = None, seed = 0, sprt = None,
+        alpha = 0.05, beta = 0.05, out = sys.stdout, geo = STANDARD):
+    """Play a match between spec_a and spec_b and return (w, d, l) for spec_a.
+
+    With sprt=(elo0, elo1) the match ends as soon as the test accepts
+    either hypothesis, or after games games.
+    """
+    parse_spec(spec_a), parse_spec(spec_b)     # fail before starting workers
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(0, games, 2):
+        opening = random_opening(rng, plies, geo)
+        for a_first in (True, False):
+            if len(tasks) < games:
+                tasks.append((len(tasks), spec_a, spec_b, opening, a_first, rng.getrandbits(32), geo))
+
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    w = d = l = 0
+    verdict = None
+    start = time.time()
+    pool = mp.Pool(workers)
+    try:
+        for i, r in pool.imap_unordered(_play, tasks):
+            w, d, l = w + (r == 1.0), d + (r == 0.5), l + (r == 0.0)
+            line = f"game {w + d + l:4}/{len(tasks)}  +{w} ={d} -{l}"
+            if sprt is not None:
+                llr = sprt_llr(w, d, l, *sprt)
+                line += f"  llr {llr:+.2f} [{lower:.2f}, {upper:.2f}]"
+                if llr >= upper:
+                    verdict = f"H1 accepted: {spec_a} is at least {sprt[1]} Elo stronger"
+                elif llr <= lower:
+                    verdict = f"H0 accepted: {spec_a} is at most {sprt[0]} Elo stronger"
+            print(line, file=out)
+            if verdict:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+
+    n = w + d + l
+    board = "" if geo is STANDARD else f" on {geo}"
+    print(f"\n{spec_a} vs {spec_b}{board}: +{w} ={d} -{l} in {n} games, {time.time() - start:.0f}s", file=out)
+    if n:
+        e, lo, hi = elo_interval(w, d, l)
+        print(f"score {(w + 0.5 * d) / n:.3f}  elo {e:+.0f}  95% [{lo:+.0f}, {hi:+.0f}]", file=out)
+    if sprt is not None:
+        print(verdict or "SPRT inconclusive", file=out)
+    return w, d, l
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Connect-4 engine tournament")
+    ap.add_argument("engine_a")
+    ap.add_argument("engine_b")
+    ap.add_argument("--games", type=int, default=100)
+    ap.add_argument("--plies", type=int, default=4, help="random opening length")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), default=None)
+    ap.add_argument("--alpha", type=float, default=0.05)
+    ap.add_argument("--beta", type=float, default=0.05)
+    ap.add_argument("--board", default="6x7", help="ROWSxCOLS or ROWSxCOLSxCONNECT, e.g. 8x9x5")
+    a = ap.parse_args()
+    try:
+        run(a.engine_a, a.engine_b, a.games, a.plies, a.workers, a.seed,
+            a.sprt, a.alpha, a.beta, geo=parse_geometry(a.board))
+    except ValueError as e:
+        ap.error(str(e))
@@ -0,0 +1,220 @@
+"""
+bench.py  –  reproducible throughput and latency benchmarks for both engines
+• fixed corpus of opening, midgame, endgame and tactical positions
+• alpha-beta at fixed depths, MCTS at fixed iteration counts, seeded RNGs
+• nodes/s, rollouts/s, p50/p95/p99 move latency and peak memory
+• JSON results, and a compare mode that flags regressions against a baseline
+• --sizes measures how throughput scales with the board: the same searches
+  on an empty and three seeded random positions of every board size
+
+    python bench.py --out baseline.json
+    python bench.py --compare baseline.json --tolerance 0.10
+    python bench.py --sizes 6x7 8x9 10x10 --depth 6 --iterations 2000
+
+Searches start from an empty table/tree with the book and the endgame
+solver turned off, so node counts only change when the search does.
+Peak memory comes from a separate tracemalloc pass, which is not timed.
+"""
+
+from __future__ import annotations
+import json, platform, random, sys, time, tracemalloc
+
+from connect_4_playing_ai import Position, AlphaBetaAgent
+from geometry import STANDARD, parse_geometry
+from monte import BitboardGame, MCTSAgent
+
+# move strings, one column digit per move
+CORPUS = {
+    "opening": ["", "33", "3342", "633466"],
+    "midgame": ["62161035600221150", "46645225324601033", "531500453605532231", "435550456400214163"],
+    "endgame": ["126114421654625563464421202", "62544405342052554516666112",
+                "10013501661451655522054462102", "5003635265641250440016224112"],
+    # the side to move has an immediate win or must block one
+    "tactical": ["225656620642", "60512644610", "451404341200", "024043556655033"],
+}
+
+DEPTHS = (4, 6, 8)
+ITERATIONS = (1000, 5000)
+SIZES = ("6x7", "7x8", "8x9", "10x10")
+SEED = 440
+
+# higher is better for these, lower for the rest of METRICS
+THROUGHPUT = ("nodes_per_s", "rollouts_per_s")
+METRICS = THROUGHPUT + ("p50_ms", "p95_ms", "p99_ms", "peak_kb")
+MIN_MS = 1.0        # latencies under this are timer noise and never flagged
+
+
+def _position(cls, moves, geo = STANDARD):
+    # moves is a move string or a list of columns
+    g = cls(geo)
+    for ch in moves:
+        g.play(int(ch))
+    return g
+
+
+def _size_positions(geo, count = 3):
+    """The empty board and count seeded random positions a third of the way
+    in, where neither side can win on the next move (so no shortcut applies)."""
+    rng = random.Random(f"{SEED} {geo}")
+    out = [[]]
+    while len(out) <= count:
+        g = BitboardGame(geo)
+        for _ in range(geo.size // 3):
+            g.play(rng.choice(g.legal_moves()))
+        mask = g.bb[0] | g.bb[1]
+        if not g.terminal()[0] and not (geo.winning_cells(g.bb[0], mask)
+                                        | geo.winning_cells(g.bb[1], mask)) & geo.playable(mask):
+            out.append(g.moves)
+    return out
+
+
+def _percentile(values, q):
+    # nearest rank on the sorted samples
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, round(q / 100 * len(s) + 0.5) - 1))]
+
+
+def _minimax_run(depth, moves, geo = STANDARD):
+    agent = AlphaBetaAgent(time_limit=None, max_depth=depth, solver_threshold=0)
+    pos = _position(Position, moves, geo)
+    start = time.perf_counter()
+    agent.search(pos)
+    return time.perf_counter() - start, agent.nodes, 0
+
+
+def _mcts_run(iterations, moves, geo = STANDARD):
+    agent = MCTSAgent(time_limit=None, max_iterations=iterations, rng=random.Random(SEED),
+                      solver_threshold=0)
+    g = _position(BitboardGame, moves, geo)
+    start = time.perf_counter()
+    agent.search(g)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(agent.arena), agent.last_iterations * agent.leaf_rollouts
+
+
+def _cases(depths, iterations):
+    for d in depths:
+        yield f"minimax/depth{d}", _minimax_run, d
+    for n in iterations:
+        yield f"mcts/iter{n}", _mcts_run, n
+
+
+def run(depths = DEPTHS, iterations = ITERATIONS, repeat = 3, categories = None, sizes = None):
+    """Benchmark results as {case: {category: metrics}}.
+
+    With sizes (geometry.Geometry objects) the categories are the board
+    sizes instead of the corpus.
+    """
+    if sizes:
+        corpus = {str(geo): [(geo, m) for m in _size_positions(geo)] for geo in sizes}
+    else:
+        corpus = {cat: [(STANDARD, m) for m in positions] for cat, positions in CORPUS.items()
+                  if not categories or cat in categories}
+    results = {}
+    for name, fn, arg in _cases(depths, iterations):
+        results[name] = {}
+        for cat, positions in corpus.items():
+            times, nodes, rollouts = [], 0, 0
+            for _ in range(repeat):
+                for geo, moves in positions:
+                    t, n, r = fn(arg, moves, geo)
+                    times.append(t)
+                    nodes += n
+                    rollouts += r
+            tracemalloc.start()
+            for geo, moves in positions:
+                fn(arg, moves, geo)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            total = sum(times)
+            row = {
+                "searches": len(times),
+                "nodes": nodes // repeat,
+                "seconds": round(total, 4),
+                "nodes_per_s": round(nodes / total),
+                "p50_ms": round(_percentile(times, 50) * 1000, 3),
+                "p95_ms": round(_percentile(times, 95) * 1000, 3),
+                "p99_ms": round(_percentile(times, 99) * 1000, 3),
+                "peak_kb": round(peak / 1024),
+            }
+            if name.startswith("mcts"):
+                row["rollouts"] = rollouts // repeat
+                row["rollouts_per_s"] = round(rollouts / total)
+            results[name][cat] = row
+            print(f"{name:16} {cat:9} {row['nodes_per_s']:>9} nodes/s  p50 {row['p50_ms']:>9.2f} ms"
+                  f"  p99 {row['p99_ms']:>9.2f} ms  peak {row['peak_kb']:>7} KB", file=sys.stderr)
+    return results
+
+
+def compare(current, baseline, tolerance = 0.10):
+    """Lines describing every metric that got worse by more than tolerance."""
+    regressions = []
+    for name, cats in current.items():
+        for cat, row in cats.items():
+            old = baseline.get(name, {}).get(cat)
+            if old is None:
+                continue
+            for key in METRICS:
+                if key not in row or not old.get(key):
+                    continue
+                if key.endswith("_ms") and max(row[key], old[key]) < MIN_MS:
+                    continue
+                change = row[key] / old[key] - 1
+                worse = -change if key in THROUGHPUT else change
+                if worse > tolerance:
+                    regressions.append(f"{name} {cat} {key}: {old[key]} -> {row[key]} ({change:+.1%})")
+            if row["nodes"] != old["nodes"]:
+                # not a regression by itself, but the search itself changed
+                print(f"note: {name} {cat} nodes {old['nodes']} -> {row['nodes']}", file=sys.stderr)
+    return regressions
+
+
+def main(argv = None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Connect-4 engine benchmarks")
+    ap.add_argument("--depth", type=int, nargs="*", default=list(DEPTHS), help="alpha-beta depths")
+    ap.add_argument("--iterations", type=int, nargs="*", default=list(ITERATIONS), help="MCTS iteration counts")
+    ap.add_argument("--category", nargs="*", choices=list(CORPUS), default=None)
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs of every position")
+    ap.add_argument("--out", default=None, help="write the JSON results here instead of stdout")
+    ap.add_argument("--compare", default=None, help="baseline JSON to check for regressions")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown")
+    ap.add_argument("--sizes", nargs="*", default=None, metavar="BOARD",
+                    help=f"board sizes to scale over instead of the corpus (default {' '.join(SIZES)})")
+    a = ap.parse_args(argv)
+    sizes = None
+    if a.sizes is not None:
+        try:
+            sizes = [parse_geometry(b) for b in a.sizes or SIZES]
+        except ValueError as e:
+            ap.error(str(e))
+
+    doc = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seed": SEED,
+        "results": run(a.depth, a.iterations, a.repeat, a.category, sizes),
+    }
+    text = json.dumps(doc, indent=2)
+    if a.out:
+        with open(a.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if a.compare:
+        with open(a.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(doc["results"], baseline, a.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {a.tolerance:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
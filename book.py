@@ -0,0 +1,172 @@
+"""
+book.py  –  opening book shared by the alpha-beta and MCTS engines
+• sorted fixed-size (key, score, move) records, opened with mmap
+• binary search on lookup, nothing is loaded into Python objects
+• python book.py --ply 4 --depth 10   builds opening_book.bin offline
+"""
+
+from __future__ import annotations
+import mmap, os, struct, time
+import multiprocessing as mp
+
+from geometry import STANDARD
+
+# books are for the standard board only
+ROWS, COLS = STANDARD.rows, STANDARD.cols
+BITS_PER_COL = STANDARD.bits_per_col
+TOP_MASKS = STANDARD.top_masks
+BOTTOM_MASK = STANDARD.bottom_mask
+
+MAGIC = b"C4BK"
+HEADER = struct.Struct("<4sBBxx")         # magic, rows, cols
+RECORD = struct.Struct("<Qhbx")           # key, score, move
+_KEY = struct.Struct("<Q")
+SCORE_MAX = 32767                         # a forced win; -SCORE_MAX a forced loss
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+
+_mirror = STANDARD.mirror
+
+
+def book_key(game):
+    """(canonical key, mirrored) for anything with a monte-layout bb pair.
+
+    Works for monte.BitboardGame and connect_4_playing_ai.Position.
+    A position and its mirror image share one key; mirrored is True when
+    the moves stored for the key must be flipped for this position.
+    """
+    key = game.bb[0] + (game.bb[0] | game.bb[1]) + BOTTOM_MASK
+    mkey = _mirror(key)
+    if mkey < key:
+        return mkey, True
+    return key, False
+
+
+class OpeningBook:
+    def __init__(self, path = DEFAULT_PATH):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{path}: not an opening book")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, rows, cols = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or (rows, cols) != (ROWS, COLS):
+            self.close()
+            raise ValueError(f"{path}: not a {ROWS}x{COLS} opening book")
+        self.size = (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.size
+
+    def lookup(self, game):
+        """(move, score) for game's side to move, or None if not in the book."""
+        key, mirrored = book_key(game)
+        mm, lo, hi = self._mm, 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k = _KEY.unpack_from(mm, HEADER.size + mid * RECORD.size)[0]
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                _, score, move = RECORD.unpack_from(mm, HEADER.size + mid * RECORD.size)
+                return (COLS - 1 - move if mirrored else move), score
+        return None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_book(path = DEFAULT_PATH):
+    """OpeningBook at path, or None when there is no book file."""
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+def write_book(records, path = DEFAULT_PATH):
+    """records: iterable of (key, score, move) with canonical keys."""
+    records = sorted(records)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, ROWS, COLS))
+        for key, score, move in records:
+            f.write(RECORD.pack(key, max(-SCORE_MAX, min(SCORE_MAX, score)), move))
+    os.replace(tmp, path)
+
+
+def book_positions(max_ply):
+    """Move lists reaching every non-terminal position of at most max_ply
+    plies, one per canonical key."""
+    from connect_4_playing_ai import Position
+    seen = set()
+    frontier = [[]]
+    out = []
+    for ply in range(max_ply + 1):
+        nxt = []
+        for moves in frontier:
+            pos = Position()
+            for c in moves:
+                pos.play(c)
+            key, _ = book_key(pos)
+            if key in seen:
+                continue
+            seen.add(key)
+            out.append(moves)
+            if ply < max_ply:
+                for c in pos.valid_moves():
+                    if not pos.is_winning_move(c):
+                        nxt.append(moves + [c])
+        frontier = nxt
+    return out
+
+
+def _search_entry(args):
+    moves, depth = args
+    from math import inf as INF
+    from connect_4_playing_ai import Position, AlphaBetaAgent, AI_PIECE
+    pos = Position()
+    for c in moves:
+        pos.play(c)
+    agent = AlphaBetaAgent(time_limit=None, max_depth=depth)
+    move = agent.search(pos)
+    score = agent.last_score
+    if pos.piece_to_move != AI_PIECE:      # search scores are for AI_PIECE
+        score = -score
+    score = SCORE_MAX if score == INF else -SCORE_MAX if score == -INF else int(score)
+    key, mirrored = book_key(pos)
+    return key, score, (COLS - 1 - move if mirrored else move)
+
+
+def generate(max_ply = 4, depth = 10, path = DEFAULT_PATH, workers = None):
+    positions = book_positions(max_ply)
+    start = time.time()
+    pool = mp.Pool(workers)
+    try:
+        records = pool.map(_search_entry, [(m, depth) for m in positions], chunksize=4)
+    finally:
+        pool.close()
+        pool.join()
+    write_book(records, path)
+    print(f"{len(records)} positions to ply {max_ply} at depth {depth} "
+          f"in {time.time() - start:.1f}s -> {path}")
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="build the Connect-4 opening book")
+    ap.add_argument("--ply", type=int, default=4)
+    ap.add_argument("--depth", type=int, default=10)
+    ap.add_argument("--out", default=DEFAULT_PATH)
+    ap.add_argument("--workers", type=int, default=None)
+    a = ap.parse_args()
+    generate(a.ply, a.depth, a.out, a.workers)
@@ -1,83 +1,79 @@
 
-# from play_connect_four import *
-from math import inf as INF
-
-import numpy as np
-import pygame
-import sys
-
-ROWS = 6
-COLS = 7
-
-
-BLUE = (0, 0, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-
-pygame.init()
-SQUARESIZE = 100
-CIRCLE_RADIUS = int(SQUARESIZE/2 - 5)
-width = COLS * SQUARESIZE
-height = (ROWS + 1) * SQUARESIZE
-screen = pygame.display.set_mode((width, height))
-clock = pygame.time.Clock()
-
+"""Alpha-beta Connect-4 engine: board rules, heuristic and search.
 
-board = np.zeros((ROWS, COLS))
+Headless: importing this module does not touch pygame or numpy.
+The game window lives in play_connect_four.py.
+Position takes any geometry.Geometry; the array functions read the board
+size from the board they are given.
+"""
+from math import inf as INF
 
+import json, os, time
 
-def draw_board(board):
-    for c in range(COLS):
-        for r in range(ROWS):
-            pygame.draw.rect(screen, BLUE, (c * SQUARESIZE, r *
-                             SQUARESIZE + SQUARESIZE, SQUARESIZE, SQUARESIZE))
-            if board[r][c] == 0:
-                pygame.draw.circle(screen, BLACK, (int(c * SQUARESIZE + SQUARESIZE/2), int(
-                    r * SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), CIRCLE_RADIUS)
-            elif board[r][c] == 1:
-                pygame.draw.circle(screen, RED, (int(c * SQUARESIZE + SQUARESIZE/2), int(
-                    r * SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), CIRCLE_RADIUS)
-            else:
-                pygame.draw.circle(screen, YELLOW, (int(c * SQUARESIZE + SQUARESIZE/2), int(
-                    r * SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), CIRCLE_RADIUS)
+from geometry import STANDARD
+from stats import SearchStats
 
-    pygame.display.update()
+ROWS = STANDARD.rows
+COLS = STANDARD.cols
 
 
 def drop_piece(board, col, piece):
-    for r in range(ROWS-1, -1, -1):
+    for r in range(len(board)-1, -1, -1):
         if (board[r][col] == 0):
             board[r][col] = piece
             return True
     return False
 
 
-# TODO: change this so it only checks the last move made
-def winning_move(board, player_piece):
+def winning_move(board, player_piece, col=None, connect=None):
+    # With col given, only the four lines through the top piece of that
+    # column (the last piece dropped there) are checked.
+    rows, cols = len(board), len(board[0])
+    n = connect or WINDOW_LENGTH
+    if col is not None:
+        for row in range(rows):
+            if board[row][col] != 0:
+                break
+        else:
+            return False
+        if board[row][col] != player_piece:
+            return False
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign*dr, col + sign*dc
+                while 0 <= r < rows and 0 <= c < cols and board[r][c] == player_piece:
+                    count += 1
+                    r += sign*dr
+                    c += sign*dc
+            if count >= n:
+                return True
+        return False
+
     # Check horizontally
-    for c in range(COLS-3):
-        for r in range(ROWS):
-            if board[r][c] == player_piece and board[r][c+1] == player_piece and board[r][c+2] == player_piece and board[r][c+3] == player_piece:
+    for c in range(cols-n+1):
+        for r in range(rows):
+            if all(board[r][c+i] == player_piece for i in range(n)):
                 return True
 
     # Check vertically
-    for c in range(COLS):
-        for r in range(ROWS-3):
-            if board[r][c] == player_piece and board[r+1][c] == player_piece and board[r+2][c] == player_piece and board[r+3][c] == player_piece:
+    for c in range(cols):
+        for r in range(rows-n+1):
+            if all(board[r+i][c] == player_piece for i in range(n)):
                 return True
 
     # Check diagonally (positively sloped)
-    for c in range(COLS-3):
-        for r in range(ROWS-3):
-            if board[r][c] == player_piece and board[r+1][c+1] == player_piece and board[r+2][c+2] == player_piece and board[r+3][c+3] == player_piece:
+    for c in range(cols-n+1):
+        for r in range(rows-n+1):
+            if all(board[r+i][c+i] == player_piece for i in range(n)):
                 return True
 
     # Check diagonally (negatively sloped)
-    for c in range(COLS-3):
-        for r in range(3, ROWS):
-            if board[r][c] == player_piece and board[r-1][c+1] == player_piece and board[r-2][c+2] == player_piece and board[r-3][c+3] == player_piece:
+    for c in range(cols-n+1):
+        for r in range(n-1, rows):
+            if all(board[r-i][c+i] == player_piece for i in range(n)):
                 return True
+    return False
 
 
 HUMAN_PIECE = 1
@@ -88,7 +84,7 @@ WINDOW_LENGTH = 4
 
 def get_valid_locations(board):
     valid_locations = []
-    for col in range(COLS):
+    for col in range(len(board[0])):
         if is_valid_location(board, col):
             valid_locations.append(col)
     return valid_locations
@@ -98,6 +94,255 @@ def is_valid_location(board, col):
     return board[0][col] == 0
 
 
+# Bitboard position used by the search. Same layout as monte.BitboardGame
+# (see geometry.py); these are the standard board's.
+BITS_PER_COL = STANDARD.bits_per_col
+TOP_MASKS = STANDARD.top_masks
+is_win = STANDARD.is_win
+
+
+# Evaluation weights: WINDOW_WEIGHTS[n] scores a window holding n stones of
+# one side and none of the other, CENTER_WEIGHT a stone in the center column.
+# tune.py fits them to game outcomes and writes eval_weights.json, which
+# replaces the hand-picked values when it exists.
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_weights.json")
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """(WINDOW_WEIGHTS, CENTER_WEIGHT) from path, or the hand-picked ones."""
+    if not os.path.exists(path):
+        return (0, 1, 2, 8), 2
+    with open(path) as f:
+        w = json.load(f)
+    return (0, *w["window"]), w["center"]
+
+
+WINDOW_WEIGHTS, CENTER_WEIGHT = load_weights()
+
+
+def window_weights(connect):
+    """WINDOW_WEIGHTS for windows of connect cells.
+
+    The loaded weights are for four; other lengths get the hand-picked
+    shape: a point per stone and four times that for one short of a line.
+    """
+    if connect == WINDOW_LENGTH:
+        return WINDOW_WEIGHTS
+    return (0, *range(1, connect - 1), 4 * max(1, connect - 2))
+
+
+_EVAL_TABLES = {}
+
+
+def eval_tables(geo):
+    """(windows, CELL_WINDOWS, CELL_BONUS, WINDOW_SCORE, CODE_STEP) for geo.
+
+    Incremental scoring. Every window keeps a code ai_count*(n+1) +
+    human_count for windows of n cells; WINDOW_SCORE[code] is its
+    evaluate_window value for AI_PIECE and CELL_WINDOWS[bit] lists the
+    windows through a cell.  Per side, CODE_STEP is the window code step
+    and CELL_BONUS the center column bonus of a cell.
+    """
+    tables = _EVAL_TABLES.get(geo)
+    if tables is None:
+        n = geo.connect
+        base = n + 1
+        weights = window_weights(n)
+        score = [0] * (base * base)
+        for k in range(1, n):
+            score[k * base] = weights[k]
+            score[k] = -weights[k]
+        bits = range(geo.cols * geo.bits_per_col)
+        cell_windows = [[w for w, m in enumerate(geo.window_masks) if m >> bit & 1] for bit in bits]
+        center = geo.center_mask
+        bonus = [[(-CENTER_WEIGHT if center >> bit & 1 else 0) for bit in bits],
+                 [(CENTER_WEIGHT if center >> bit & 1 else 0) for bit in bits]]
+        tables = _EVAL_TABLES[geo] = (len(geo.window_masks), cell_windows, bonus, score, (1, base))
+    return tables
+
+
+class Position:
+    """Bitboard board for the alpha-beta search, played and undone in place.
+
+    bb[0] holds HUMAN_PIECE stones and bb[1] holds AI_PIECE stones.
+    HUMAN_PIECE moves first, so the side to move follows from the move count.
+    geo is the board (geometry.Geometry), the standard 6x7 by default.
+    """
+    __slots__ = ("bb", "heights", "moves", "score", "codes", "geo", "tables")
+
+    def __init__(self, geo=STANDARD):
+        self.geo = geo
+        self.bb = [0, 0]
+        self.heights = [c * geo.bits_per_col + 1 for c in range(geo.cols)]
+        self.moves = []
+        # heuristic value for AI_PIECE, kept up to date by play/undo
+        self.score = 0
+        windows, *self.tables = eval_tables(geo)
+        self.codes = [0] * windows
+
+    @classmethod
+    def from_array(cls, board, geo=STANDARD):
+        pos = cls(geo)
+        for c in range(geo.cols):
+            for r in range(geo.rows-1, -1, -1):
+                piece = int(board[r][c])
+                if piece == EMPTY:
+                    break
+                pos._place(piece - 1, c)
+                pos.moves.append(c)
+        return pos
+
+    def to_array(self):
+        import numpy as np
+        geo = self.geo
+        board = np.zeros((geo.rows, geo.cols))
+        for c in range(geo.cols):
+            for r in range(geo.rows):
+                # r counts from the top like the numpy board
+                bit = geo.cell(geo.rows - 1 - r, c)
+                if self.bb[0] & bit:
+                    board[r][c] = HUMAN_PIECE
+                elif self.bb[1] & bit:
+                    board[r][c] = AI_PIECE
+        return board
+
+    @property
+    def piece_to_move(self):
+        return (len(self.moves) & 1) + 1
+
+    def can_play(self, col):
+        return not (self.bb[0] | self.bb[1]) & self.geo.top_masks[col]
+
+    def valid_moves(self):
+        occ = self.bb[0] | self.bb[1]
+        top = self.geo.top_masks
+        return [c for c in range(self.geo.cols) if not occ & top[c]]
+
+    def is_winning_move(self, col):
+        side = len(self.moves) & 1
+        return self.geo.is_win(self.bb[side] | 1 << self.heights[col])
+
+    def _place(self, side, col):
+        bit = self.heights[col]
+        self.heights[col] = bit + 1
+        self.bb[side] |= 1 << bit
+        cell_windows, cell_bonus, window_score, code_step = self.tables
+        step = code_step[side]
+        codes = self.codes
+        score = self.score + cell_bonus[side][bit]
+        for w in cell_windows[bit]:
+            code = codes[w]
+            codes[w] = code + step
+            score += window_score[code + step] - window_score[code]
+        self.score = score
+
+    def play(self, col):
+        self._place(len(self.moves) & 1, col)
+        self.moves.append(col)
+
+    def undo(self):
+        col = self.moves.pop()
+        bit = self.heights[col] - 1
+        self.heights[col] = bit
+        side = 0 if self.bb[0] >> bit & 1 else 1
+        self.bb[side] &= ~(1 << bit)
+        cell_windows, cell_bonus, window_score, code_step = self.tables
+        step = code_step[side]
+        codes = self.codes
+        score = self.score - cell_bonus[side][bit]
+        for w in cell_windows[bit]:
+            code = codes[w]
+            codes[w] = code - step
+            score += window_score[code - step] - window_score[code]
+        self.score = score
+
+    def last_move_won(self):
+        if not self.moves:
+            return False
+        return self.geo.is_win(self.bb[(len(self.moves) & 1) ^ 1])
+
+    def is_full(self):
+        return len(self.moves) == self.geo.size
+
+    def key(self):
+        # unique per position: HUMAN_PIECE stones plus one marker bit above
+        # every column's stack
+        return self.bb[0] + (self.bb[0] | self.bb[1]) + self.geo.bottom_mask
+
+
+# a column's key bits start one bit above its separator
+mirror_key = STANDARD.mirror
+
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """Fixed-size two-tier table of searched positions.
+
+    Every index holds a depth-preferred slot, replaced only by searches at
+    least as deep, and an always-replace slot for the newest entry.
+    A position and its left-right mirror share one entry.
+    Entries are (key, depth, flag, score, move).
+    """
+
+    def __init__(self, entries=1 << 20):
+        self.size = max(1, entries // 2)
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+        self.probes = self.hits = 0
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def probe(self, pos):
+        """Return (depth, flag, score, move) for pos or None."""
+        self.probes += 1
+        key = pos.key()
+        mkey = pos.geo.mirror(key)
+        mirrored = mkey < key
+        if mirrored:
+            key = mkey
+        i = key % self.size
+        entry = self.deep[i]
+        if entry is None or entry[0] != key:
+            entry = self.recent[i]
+            if entry is None or entry[0] != key:
+                return None
+        self.hits += 1
+        _, depth, flag, score, move = entry
+        if mirrored and move is not None:
+            move = pos.geo.cols - 1 - move
+        return depth, flag, score, move
+
+    def store(self, pos, depth, flag, score, move):
+        key = pos.key()
+        mkey = pos.geo.mirror(key)
+        if mkey < key:
+            key = mkey
+            if move is not None:
+                move = pos.geo.cols - 1 - move
+        i = key % self.size
+        entry = (key, depth, flag, score, move)
+        old = self.deep[i]
+        if old is None or depth >= old[1]:
+            self.deep[i] = entry
+        else:
+            self.recent[i] = entry
+
+
+def evaluate_position(pos):
+    """heuristic(pos.to_array(), AI_PIECE), maintained incrementally."""
+    return pos.score
+
+
 def is_terminal_node(board):
     return (winning_move(board, HUMAN_PIECE)
          or winning_move(board, AI_PIECE)
@@ -106,54 +351,55 @@ def is_terminal_node(board):
 
 def evaluate_window(window, piece):
     score = 0
+    n_cells = len(window)
+    weights = window_weights(n_cells)
     opp_piece = HUMAN_PIECE if (piece == AI_PIECE) else AI_PIECE
     for p in [piece, opp_piece]:
         multiplier = 1 if p == piece else -1
         #our current minimax function already checks this case
         # if window.count(piece) == 4:
         #     score += INF * multiplier
-        if window.count(p) == 3 and window.count(EMPTY) == 1:
-            score += 8 * multiplier
-        elif window.count(p) == 2 and window.count(EMPTY) == 2:
-            score += 2 * multiplier
-        elif window.count(p) == 1 and window.count(EMPTY) == 3:
-            score += 1 * multiplier
+        n = window.count(p)
+        if 0 < n < n_cells and window.count(EMPTY) == n_cells - n:
+            score += weights[n] * multiplier
             
     return score
 
 
-def heuristic(board, piece):
+def heuristic(board, piece, connect=None):
     score = 0
-    # Score center column
-    center_array = [int(i) for i in list(board[:, COLS//2])]
-    center_count = center_array.count(AI_PIECE)
-    score += center_count * 2
-    opp_count = center_array.count(HUMAN_PIECE)
-    score -= opp_count * 2
+    rows, cols = board.shape
+    n = connect or WINDOW_LENGTH
+    # Score center column (both middle columns on an even width)
+    center_array = [int(i) for i in board[:, (cols-1)//2:cols//2+1].ravel()]
+    center_count = center_array.count(piece)
+    score += center_count * CENTER_WEIGHT
+    opp_count = center_array.count(HUMAN_PIECE if piece == AI_PIECE else AI_PIECE)
+    score -= opp_count * CENTER_WEIGHT
 
     # Score Horizontal
-    for r in range(ROWS):
+    for r in range(rows):
         row_array = [int(i) for i in list(board[r, :])]
-        for c in range(COLS-3):
-            window = row_array[c:c+WINDOW_LENGTH]
+        for c in range(cols-n+1):
+            window = row_array[c:c+n]
             score += evaluate_window(window, piece)
 
     # Score Vertical
-    for c in range(COLS):
+    for c in range(cols):
         col_array = [int(i) for i in list(board[:, c])]
-        for r in range(ROWS-3):
-            window = col_array[r:r+WINDOW_LENGTH]
+        for r in range(rows-n+1):
+            window = col_array[r:r+n]
             score += evaluate_window(window, piece)
             
     # Score positive sloped diagonal
-    for r in range(ROWS-3, ROWS):
-        for c in range(COLS-3):
-            window = [int(board[r-i][c+i]) for i in range(WINDOW_LENGTH)]
+    for r in range(n-1, rows):
+        for c in range(cols-n+1):
+            window = [int(board[r-i][c+i]) for i in range(n)]
             score += evaluate_window(window, piece)
             
-    for r in range(ROWS-3):
-        for c in range(COLS-3):
-            window = [int(board[r+i][c+i]) for i in range(WINDOW_LENGTH)]
+    for r in range(rows-n+1):
+        for c in range(cols-n+1):
+            window = [int(board[r+i][c+i]) for i in range(n)]
             score += evaluate_window(window, piece)
     return score
 
@@ -167,103 +413,323 @@ def heuristic(board, piece):
 # 	return score
 
 
-def minimax(board, depth, alpha, beta, maximizingPlayer):
-    valid_locations = get_valid_locations(board)
-    is_terminal = is_terminal_node(board)
-    if depth == 0 or is_terminal:
-        if is_terminal:
-            # print(board)
-            # print("depth: ", depth)
-            if winning_move(board, AI_PIECE):
-                return (None, INF)
-            elif winning_move(board, HUMAN_PIECE):
-                return (None, -INF)
-            else:  # Game is over, no more valid moves
-                return (None, 0)
-        else:  # Depth is zero
-            return (None, heuristic(board, AI_PIECE))
-    if maximizingPlayer:
-        score = -INF
-        column = valid_locations[0]
-        for col in valid_locations:
-            b_copy = board.copy()
-            drop_piece(b_copy, col, AI_PIECE)
-            _, new_score = minimax(b_copy, depth-1, alpha, beta, False)
-            if new_score > score:
-                score = new_score
-                column = col
-            alpha = max(alpha, score)
-            if alpha >= beta:
+MAX_PLY = ROWS * COLS
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class AlphaBetaAgent:
+    """Iterative-deepening alpha-beta search with a per-move time budget.
+
+    search() deepens one ply at a time and returns the best move of the
+    deepest iteration that finished before time_limit ran out.
+    Moves are tried in this order: PV move, TT move, killers, history,
+    and center-first as the base order.
+    """
+
+    def __init__(self, time_limit=1.2, max_depth=MAX_PLY, tt_entries=1 << 20,
+                 aspiration=16, book=None, stop=None, solver_threshold=18,
+                 on_stats=None, profiler=None, node_budget=None):
+        self.time_limit = time_limit
+        # optional node count after which the search stops like on a timeout;
+        # unlike time_limit it gives the same move on every machine
+        self.node_budget = INF if node_budget is None else node_budget
+        self.book = book
+        # with this many empty cells or fewer, play the exact solver's move
+        self.solver_threshold = solver_threshold
+        self.solver = None
+        # optional object with is_set(); when set the search stops like
+        # it does when time runs out
+        self.stop = stop
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_entries) if tt_entries else None
+        self.aspiration = aspiration
+        self.geo = None
+        self._fit(STANDARD)
+        self.pv = {}
+        self.nodes = 0
+        self.next_check = 0
+        self.cutoffs = 0
+        self.tt_hits = 0
+        self.tt_probes = 0
+        self.deadline = None
+        self.last_depth = 0
+        self.last_score = 0
+        # on_stats(SearchStats) is called after every search; a
+        # stats.SamplingProfiler in profiler samples each search
+        self.on_stats = on_stats
+        self.profiler = profiler
+        self.last_stats = None
+
+    def _fit(self, geo):
+        # killers, history and the table belong to one board size
+        if geo is self.geo:
+            return
+        self.geo = geo
+        self.killers = [[None, None] for _ in range(geo.size + 1)]
+        self.history = [[0] * (geo.cols * geo.bits_per_col) for _ in range(2)]
+        if self.tt is not None:
+            self.tt.clear()
+
+    def search(self, pos):
+        stats = SearchStats("minimax")
+        start = time.perf_counter()
+        self.nodes = self.next_check = self.cutoffs = self.tt_hits = self.tt_probes = 0
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            column = self._search(pos, stats)
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+                stats.profile = self.profiler.top()
+        stats.elapsed = time.perf_counter() - start
+        stats.move = column
+        stats.score = self.last_score
+        stats.depth = self.last_depth
+        stats.nodes = self.nodes
+        stats.cutoffs = self.cutoffs
+        stats.tt_hits = self.tt_hits
+        stats.tt_probes = self.tt_probes
+        self.last_stats = stats
+        if self.on_stats is not None:
+            self.on_stats(stats)
+        return column
+
+    def _search(self, pos, stats):
+        self._fit(pos.geo)
+        maximizing = pos.piece_to_move == AI_PIECE
+        base = len(pos.moves)
+        size = pos.geo.size
+        self.pv = {}
+        self.deadline = None
+        valid_locations = pos.valid_moves()
+        if not valid_locations:
+            return None
+        # the book and the solver only know the standard board
+        if self.book is not None and pos.geo is STANDARD:
+            t = time.perf_counter()
+            hit = self.book.lookup(pos)
+            stats.phases["book"] = time.perf_counter() - t
+            if hit is not None and pos.can_play(hit[0]):
+                stats.source = "book"
+                self.last_depth = 0
+                self.last_score = hit[1] if maximizing else -hit[1]
+                return hit[0]
+        if pos.geo is STANDARD and size - base <= self.solver_threshold:
+            t = time.perf_counter()
+            column = self._solve(pos, maximizing)
+            stats.phases["solver"] = time.perf_counter() - t
+            stats.source = "solver"
+            return column
+        column, score = valid_locations[0], 0
+        self.last_depth = 0
+        for depth in range(1, min(self.max_depth, size - base) + 1):
+            t = time.perf_counter()
+            try:
+                column, score = self._root(pos, depth, maximizing, score)
+            except _SearchTimeout:
+                while len(pos.moves) > base:
+                    pos.undo()
+                stats.phases[f"depth {depth} (cut)"] = time.perf_counter() - t
                 break
+            stats.phases[f"depth {depth}"] = time.perf_counter() - t
+            # effective branching factor: the b with b**depth == nodes so far;
+            # the ratio of successive iterations means little once the table is warm
+            stats.ebf = self.nodes ** (1 / depth)
+            self.last_depth = depth
+            if abs(score) == INF:
+                break  # forced result, deeper search changes nothing
+            self._collect_pv(pos, depth)
+            if self.deadline is None:
+                # depth 1 always completes so there is a move to return
+                self.deadline = time.perf_counter() + (INF if self.time_limit is None else self.time_limit)
+        self.deadline = None
+        self.last_score = score
+        return column
+
+    def _solve(self, pos, maximizing):
+        if self.solver is None:
+            from solver import Solver
+            self.solver = Solver()
+        column, score = self.solver.best_move(pos)
+        score = INF if score > 0 else -INF if score < 0 else 0
+        self.last_depth = MAX_PLY - len(pos.moves)
+        self.last_score = score if maximizing else -score
+        return column
+
+    def _root(self, pos, depth, maximizing, prev_score):
+        if depth > 1 and self.aspiration and abs(prev_score) != INF:
+            alpha = prev_score - self.aspiration
+            beta = prev_score + self.aspiration
+            column, score = self._minimax(pos, depth, alpha, beta, maximizing, True)
+            if alpha < score < beta:
+                return column, score
+        return self._minimax(pos, depth, -INF, INF, maximizing, True)
+
+    def _collect_pv(self, pos, depth):
+        self.pv = {}
+        played = 0
+        while played < depth and self.tt is not None:
+            entry = self.tt.probe(pos)
+            if entry is None or entry[3] is None or not pos.can_play(entry[3]):
+                break
+            self.pv[len(pos.moves)] = entry[3]
+            pos.play(entry[3])
+            played += 1
+        for _ in range(played):
+            pos.undo()
+
+    def _order(self, pos, moves, first):
+        side = len(pos.moves) & 1
+        hist = self.history[side]
+        heights = pos.heights
+        killers = self.killers[len(pos.moves)]
+        # cells right under an opponent threat hand them the win: try them last
+        mask = pos.bb[0] | pos.bb[1]
+        under = pos.geo.winning_cells(pos.bb[side ^ 1], mask) >> 1
+        center = pos.geo.center_rank
+        moves.sort(key=lambda c: (c != first, under >> heights[c] & 1, c not in killers,
+                                  -hist[heights[c]], center[c]))
+
+    def _frontier(self, pos, valid_locations, maximizingPlayer):
+        # All children are leaves: score them in one pass from the
+        # incremental evaluation instead of one recursive call each.
+        self.nodes += len(valid_locations)
+        full = len(pos.moves) + 1 == pos.geo.size
+        column, score = None, (-INF if maximizingPlayer else INF)
+        for col in valid_locations:
+            pos.play(col)
+            new_score = 0 if full else pos.score
+            pos.undo()
+            if new_score > score if maximizingPlayer else new_score < score:
+                column, score = col, new_score
         return column, score
 
-    else:  # Minimizing player
-        score = INF
-        column = valid_locations[0]
-        for col in valid_locations:
-            b_copy = board.copy()
-            drop_piece(b_copy, col, HUMAN_PIECE)
-            _, new_score = minimax(b_copy, depth-1, alpha, beta, True)
-            if new_score < score:
-                score = new_score
-                column = col
-            beta = min(beta, score)
-            if alpha >= beta:
-                break
+    def _minimax(self, pos, depth, alpha, beta, maximizingPlayer, on_pv=False):
+        # pos is a Position; moves are played and undone in place, so the
+        # position is unchanged when this returns.
+        self.nodes += 1
+        # _frontier counts a batch of nodes at once, so compare against a
+        # threshold rather than testing the low bits of the counter
+        if self.deadline is not None and self.nodes >= self.next_check:
+            self.next_check = self.nodes + 1024
+            if (self.nodes > self.node_budget
+                    or time.perf_counter() > self.deadline
+                    or self.stop is not None and self.stop.is_set()):
+                raise _SearchTimeout
+        valid_locations = pos.valid_moves()
+        if not valid_locations:  # Game is over, no more valid moves
+            return (None, 0)
+        if depth == 0:
+            return (None, evaluate_position(pos))
+        # A win for the side to move ends the game on the spot, so it is found
+        # here instead of by searching the child and testing it for a terminal.
+        # This also means no position reached by the search is already won.
+        side = len(pos.moves) & 1
+        mask = pos.bb[0] | pos.bb[1]
+        geo = pos.geo
+        play = geo.playable(mask)
+        win = geo.winning_cells(pos.bb[side], mask) & play
+        if win:
+            return (geo.lowest_column(win), INF if maximizingPlayer else -INF)
+        # an opponent threat that can be filled next move must be blocked now
+        forced = geo.winning_cells(pos.bb[side ^ 1], mask) & play
+        if forced:
+            valid_locations = [col for col in valid_locations if forced >> pos.heights[col] & 1]
+        if depth == 1:
+            return self._frontier(pos, valid_locations, maximizingPlayer)
+
+        alpha_orig, beta_orig = alpha, beta
+        tt = self.tt
+        first = None
+        if tt is not None:
+            entry = tt.probe(pos)
+            self.tt_probes += 1
+            if entry is not None:
+                self.tt_hits += 1
+                tt_depth, flag, tt_score, first = entry
+                if tt_depth >= depth:
+                    if flag == EXACT:
+                        return first, tt_score
+                    elif flag == LOWER:
+                        alpha = max(alpha, tt_score)
+                    else:
+                        beta = min(beta, tt_score)
+                    if alpha >= beta:
+                        return first, tt_score
+        ply = len(pos.moves)
+        pv_move = self.pv.get(ply) if on_pv else None
+        if pv_move is not None:
+            first = pv_move
+        if len(valid_locations) > 1:
+            self._order(pos, valid_locations, first)
+
+        if maximizingPlayer:
+            score = -INF
+            column = valid_locations[0]
+            for col in valid_locations:
+                pos.play(col)
+                _, new_score = self._minimax(pos, depth-1, alpha, beta, False,
+                                             col == pv_move)
+                pos.undo()
+                if new_score > score:
+                    score = new_score
+                    column = col
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+
+        else:  # Minimizing player
+            score = INF
+            column = valid_locations[0]
+            for col in valid_locations:
+                pos.play(col)
+                _, new_score = self._minimax(pos, depth-1, alpha, beta, True,
+                                             col == pv_move)
+                pos.undo()
+                if new_score < score:
+                    score = new_score
+                    column = col
+                beta = min(beta, score)
+                if alpha >= beta:
+                    break
+
+        if alpha >= beta:
+            self.cutoffs += 1
+            killers = self.killers[ply]
+            if killers[0] != column:
+                killers[1] = killers[0]
+                killers[0] = column
+            self.history[ply & 1][pos.heights[column]] += depth * depth
+        if tt is not None:
+            if score <= alpha_orig:
+                flag = UPPER
+            elif score >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            tt.store(pos, depth, flag, score, column)
         return column, score
 
 
+def minimax(pos, depth, alpha, beta, maximizingPlayer, tt=None):
+    """Fixed-depth search of pos; returns (column, score) for AI_PIECE."""
+    if maximizingPlayer != (pos.piece_to_move == AI_PIECE):
+        raise ValueError("maximizingPlayer must be True exactly when AI_PIECE is to move")
+    agent = AlphaBetaAgent(time_limit=None, tt_entries=0)
+    agent._fit(pos.geo)
+    agent.tt = tt
+    return agent._minimax(pos, depth, alpha, beta, maximizingPlayer)
+
+
 def play_game():
-    myfont = pygame.font.SysFont("monospace", 75)
-    draw_board(board)
-    game_over = False
-    turn = 0
-
-    while not game_over:
-        for event in pygame.event.get():
-            player_piece = turn % 2 + 1
-            color = RED if player_piece == 1 else YELLOW
-            if event.type == pygame.QUIT:
-                sys.exit()
-            if player_piece == HUMAN_PIECE:
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    posx = event.pos[0]
-                    col = int(posx // SQUARESIZE)
-                    drop_piece(board, col, player_piece)
-                    turn += 1
-                    if winning_move(board, player_piece):
-                        label = myfont.render(f"Player {HUMAN_PIECE} wins!", 1, color)     
-                        screen.blit(label, (40, 10))
-                        game_over = True
-
-            elif player_piece == AI_PIECE:
-                col, score = minimax(board, 5, -INF, INF, True)
-                print("score: ", score)
-                if (col == None):
-                  print("No valid moves")
-                else:
-                    drop_piece(board, col, player_piece)
-                turn += 1
-                if winning_move(board, player_piece):
-                    label = myfont.render(f"Player {AI_PIECE} wins!", 1, color)     
-                    screen.blit(label, (40,10))
-                    game_over = True
-                    
-            if len(get_valid_locations(board)) == 0 and game_over == False:
-                label = myfont.render("It's a draw!", 1, color)     
-                screen.blit(label, (40,10))
-                game_over = True
-                            
-            # if winning_move(board, player_piece):
-            #     if player_piece == 1:
-            #         label = myfont.render("Player 1 wins!", 1, RED)
-            #     else:
-            #         label = myfont.render("Player 2 wins!", 1, YELLOW)
-            #         screen.blit(label, (40,10))
-            #         game_over = True
-            draw_board(board)
-
-    #show the final board state before closing
-    pygame.time.wait(3000)
-
-play_game()
+    # the pygame front end is only imported when a window is wanted
+    from play_connect_four import play_game as _play_game
+    _play_game()
+
+
+if __name__ == "__main__":
+    play_game()
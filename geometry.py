@@ -0,0 +1,206 @@
+"""
+geometry.py  –  board size and connect length, shared by every engine
+• Geometry(rows, cols, connect) generates the bitboard masks, shifts, win
+  test, threat cells and window masks for one board
+• bitboards are plain Python ints, so boards wider than 64 bits (8x9, 10x10)
+  work the same as the standard 6x7
+• get() caches one Geometry per size; STANDARD is 6x7 connect 4
+
+Layout (monte.BitboardGame, connect_4_playing_ai.Position and solver.py):
+column c takes rows + 1 bits from bit c * (rows + 1); its bit 0 is an
+always-empty separator and rows 0..rows-1, bottom to top, sit on bits
+1..rows.  The separators stop every line shift from wrapping into the
+next column, for any board size and connect length.
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+
+
+class Geometry:
+    """Rules of one board: rows x cols, connect stones in a line to win.
+
+    is_win, winning_cells, playable and lowest_column are closures over
+    this board's shifts, so they cost the same as module functions in the
+    search loops.
+    """
+
+    def __init__(self, rows = 6, cols = 7, connect = 4):
+        if rows < 1 or cols < 1 or not 2 <= connect <= max(rows, cols):
+            raise ValueError(f"no connect {connect} game on a {rows}x{cols} board")
+        if cols > 127:
+            raise ValueError("at most 127 columns")
+        self.rows, self.cols, self.connect = rows, cols, connect
+        self.size = rows * cols
+        b = self.bits_per_col = rows + 1
+        self.col_masks = [(1 << b) - 1 << (c * b) for c in range(cols)]
+        self.top_masks = [1 << (rows + c * b) for c in range(cols)]
+        self.full_heights = [rows + 1 + c * b for c in range(cols)]     # heights[c] of a full column
+        self.bottom_mask = sum(1 << (c * b + 1) for c in range(cols))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        # vertical, horizontal and the two diagonals
+        self.shifts = (1, b, b - 1, b + 1)
+        # center column first; ties go to the left
+        self.center_order = sorted(range(cols), key=lambda c: (abs(2 * c - cols + 1), c))
+        self.center_rank = [abs(2 * c - cols + 1) for c in range(cols)]
+        # the middle column, or both middle columns on an even width, so the
+        # center bonus is the same for a position and its mirror image
+        self.center_cols = sorted({(cols - 1) // 2, cols // 2})
+        self.center_mask = sum(self.cell(r, c) for r in range(rows) for c in self.center_cols)
+        self.window_masks = [sum(self.cell(r, c) for r, c in line) for line in self.lines()]
+
+        # shift amounts that leave, per direction, the start of every run of
+        # connect stones: runs of k are doubled to 2k until the last step
+        self.win_steps = []
+        for s in self.shifts:
+            k, steps = 1, []
+            while 2 * k <= connect:
+                steps.append(k * s)
+                k *= 2
+            if k < connect:
+                steps.append((connect - k) * s)
+            self.win_steps.append(steps)
+
+        self.is_win = _is_win(self.shifts, connect, self.win_steps)
+        self.winning_cells = _winning_cells(self.shifts, connect, self.board_mask)
+        bottom, board = self.bottom_mask, self.board_mask
+
+        def playable(mask):
+            """The cell a stone would land on in every non-full column."""
+            return (mask + bottom) & board
+
+        def lowest_column(cells):
+            """Column of the lowest set bit of a non-empty cell mask."""
+            return ((cells & -cells).bit_length() - 1) // b
+
+        self.playable = playable
+        self.lowest_column = lowest_column
+
+    def __repr__(self):
+        return f"Geometry({self.rows}, {self.cols}, {self.connect})"
+
+    def __str__(self):
+        return f"{self.rows}x{self.cols}" + ("" if self.connect == 4 else f"x{self.connect}")
+
+    def __reduce__(self):
+        # closures do not pickle; worker processes rebuild from the size
+        return get, (self.rows, self.cols, self.connect)
+
+    @property
+    def fits_64(self):
+        """True when a position key, marker bits included, fits a uint64."""
+        return self.cols * self.bits_per_col < 64
+
+    def cell(self, row, col):
+        """Bit of (row, col), row 0 at the bottom."""
+        return 1 << (col * self.bits_per_col + 1 + row)
+
+    def lines(self):
+        """Every line of connect cells as [(row, col), ...], row 0 at the bottom:
+        horizontal, vertical, then both diagonals."""
+        n, rows, cols = self.connect, self.rows, self.cols
+        out = []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+            for r in range(rows):
+                for c in range(cols):
+                    if 0 <= r + (n - 1) * dr < rows and c + (n - 1) * dc < cols:
+                        out.append([(r + i * dr, c + i * dc) for i in range(n)])
+        return out
+
+    def mirror(self, key):
+        """key (or bitboard) of the left-right mirrored position."""
+        b, cols = self.bits_per_col, self.cols
+        col = (1 << b) - 1
+        m = 0
+        for c in range(cols):
+            m |= ((key >> (c * b + 1)) & col) << ((cols - 1 - c) * b + 1)
+        return m
+
+
+def _is_win(shifts, n, win_steps):
+    if n == 4:
+        v, h, d1, d2 = shifts
+
+        def is_win(bb):
+            m = bb & (bb >> v)
+            if m & (m >> 2 * v): return True
+            m = bb & (bb >> h)
+            if m & (m >> 2 * h): return True
+            m = bb & (bb >> d1)
+            if m & (m >> 2 * d1): return True
+            m = bb & (bb >> d2)
+            return bool(m & (m >> 2 * d2))
+        return is_win
+
+    def is_win(bb):
+        for st in win_steps:
+            m = bb
+            for k in st:
+                m &= m >> k
+            if m:
+                return True
+        return False
+    return is_win
+
+
+def _winning_cells(shifts, n, board):
+    if n == 4:
+        v, h, d1, d2 = shifts
+
+        def winning_cells(p, mask):
+            """Empty cells that would complete four for the stones p."""
+            r = (p << v) & (p << 2 * v) & (p << 3 * v)
+            for s in (h, d1, d2):
+                q = (p << s) & (p << 2 * s)
+                r |= q & (p << 3 * s)
+                r |= q & (p >> s)
+                q = (p >> s) & (p >> 2 * s)
+                r |= q & (p << s)
+                r |= q & (p >> 3 * s)
+            return r & (board ^ mask)
+        return winning_cells
+
+    steps = [[k * s for k in range(1, n)] for s in shifts[1:]]
+
+    def winning_cells(p, mask):
+        """Empty cells that would complete a line of n for the stones p."""
+        r = p << 1
+        for k in range(2, n):
+            r &= p << k
+        # below[k]: cells with k stones of p right before them along a
+        # line; a cell wins with k of them before it and n-1-k after
+        for st in steps:
+            below = [-1]
+            b = -1
+            for k in st:
+                b &= p << k
+                below.append(b)
+            r |= b
+            a = -1
+            for i, k in enumerate(st, 2):
+                a &= p >> k
+                r |= a & below[-i]
+        return r & (board ^ mask)
+    return winning_cells
+
+
+def get(rows = 6, cols = 7, connect = 4):
+    """The shared Geometry for a board size; built once per size."""
+    return _get(rows, cols, connect)
+
+
+_get = lru_cache(maxsize=None)(Geometry)
+
+
+STANDARD = get()
+
+
+def parse_geometry(text):
+    """Geometry from "ROWSxCOLS" or "ROWSxCOLSxCONNECT", e.g. "8x9" or "10x10x5"."""
+    try:
+        parts = [int(t) for t in text.lower().split("x")]
+    except ValueError:
+        parts = []
+    if len(parts) not in (2, 3):
+        raise ValueError(f"bad board {text!r}, expected ROWSxCOLS or ROWSxCOLSxCONNECT")
+    return get(*parts)
@@ -0,0 +1,109 @@
+"""
+heuristic.py  –  batched window evaluation for the alpha-beta engine
+• scores a stack of (N, rows, cols) boards with one set of NumPy ops
+• same numbers as connect_4_playing_ai.heuristic, board by board
+• the window-pattern features behind the score, for tune.py and other batch work
+• window index tables are built per board size and connect length (geometry.py)
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from connect_4_playing_ai import CENTER_WEIGHT, window_weights
+from geometry import STANDARD, get
+
+EMPTY, HUMAN_PIECE, AI_PIECE = 0, 1, 2
+WINDOW_LENGTH = 4
+CHUNK = 1 << 15                 # boards scored per pass, bounds temp memory
+
+
+@lru_cache(maxsize=None)
+def _windows(rows, cols, connect):
+    # (windows, connect) row / column index of every window cell, rows
+    # counted from the top like the boards
+    idx = np.array(get(rows, cols, connect).lines())
+    return rows - 1 - idx[:, :, 0], idx[:, :, 1]
+
+
+@lru_cache(maxsize=None)
+def _cell_bits(geo):
+    # board cell (r, c), r counted from the top, is bit [r, c] of a bitboard
+    b = geo.bits_per_col
+    return np.array([[c * b + geo.rows - r for c in range(geo.cols)] for r in range(geo.rows)],
+                    dtype=np.uint64)
+
+
+def _stack(boards):
+    boards = np.asarray(boards)
+    return boards[None] if boards.ndim == 2 else boards
+
+
+def boards_from_bitboards(bb, geo=STANDARD):
+    """(N, rows, cols) int8 boards from an (N, 2) array of bitboard pairs.
+
+    bb[:, 0] become HUMAN_PIECE (the side that moves first) and bb[:, 1]
+    AI_PIECE, as in connect_4_playing_ai.Position.  The bitboards are
+    uint64, so geo must fit 64 bits.
+    """
+    if not geo.fits_64:
+        raise ValueError(f"{geo} bitboards do not fit 64 bits")
+    bits = _cell_bits(geo)
+    bb = np.asarray(bb, dtype=np.uint64)
+    first = (bb[:, 0, None, None] >> bits) & np.uint64(1)
+    second = (bb[:, 1, None, None] >> bits) & np.uint64(1)
+    return (first * HUMAN_PIECE + second * AI_PIECE).astype(np.int8)
+
+
+def pattern_counts(boards, piece=AI_PIECE, connect=WINDOW_LENGTH):
+    """(N, connect+1, connect+1) window counts by [own, opponent] pieces."""
+    boards = _stack(boards)
+    rows, cols = _windows(boards.shape[1], boards.shape[2], connect)
+    base = connect + 1
+    patterns = base * base
+    opp = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+    out = np.empty((len(boards), patterns), dtype=np.int64)
+    for lo in range(0, len(boards), CHUNK):
+        w = boards[lo:lo + CHUNK, rows, cols]
+        code = np.count_nonzero(w == piece, axis=2) * base + np.count_nonzero(w == opp, axis=2)
+        # one bincount for the whole chunk: board i uses bins i*patterns...
+        code += (np.arange(len(w)) * patterns)[:, None]
+        out[lo:lo + CHUNK] = np.bincount(code.ravel(), minlength=len(w) * patterns).reshape(len(w), patterns)
+    return out.reshape(len(boards), base, base)
+
+
+def center_counts(boards, piece=AI_PIECE):
+    """Own minus opponent pieces in the center column (both middle
+    columns on an even width), per board."""
+    boards = _stack(boards)
+    opp = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+    cols = boards.shape[2]
+    center = boards[:, :, (cols - 1) // 2:cols // 2 + 1]
+    return np.count_nonzero(center == piece, axis=(1, 2)) - np.count_nonzero(center == opp, axis=(1, 2))
+
+
+def features(boards, piece=AI_PIECE, connect=WINDOW_LENGTH):
+    """(N, connect) terms of the heuristic, one per weight.
+
+    Columns 0..connect-2 count windows with n = 1, 2, ... pieces of
+    piece and no opponent piece, minus the same for the opponent; the last
+    column is center_counts.  The heuristic is features @ weights().
+    """
+    counts = pattern_counts(boards, piece, connect)
+    n = np.arange(1, connect)
+    windows = counts[:, n, 0] - counts[:, 0, n]
+    return np.concatenate([windows, center_counts(boards, piece)[:, None]], axis=1)
+
+
+def weights(connect=WINDOW_LENGTH):
+    """The weight vector that goes with features()."""
+    return np.array([*window_weights(connect)[1:connect], CENTER_WEIGHT])
+
+
+def evaluate_many(boards, piece=AI_PIECE, connect=WINDOW_LENGTH):
+    """Heuristic score of every board in an (N, rows, cols) stack for piece.
+
+    A single (rows, cols) board is accepted and scored as a stack of one.
+    Returns an array of N scores, int64 unless the weights are tuned floats.
+    """
+    return features(boards, piece, connect) @ weights(connect)
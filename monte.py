@@ -1,53 +1,61 @@
 """
 monte.py  –  Monte-Carlo-Tree-Search Connect-4 engine
-• 64-bit bitboards
+• arbitrary-width int bitboards, any board size and connect length (geometry.py)
+• root-parallel search over a pool of warm worker processes
+• optional NumPy lockstep playouts (rollouts.py)
+• tree reuse between moves with a node ceiling
+• opening book lookup before searching (book.py)
+• exact endgame play from solver.py below solver_threshold empty cells
+• human_vs_ai ponders on your time (ponder.py)
+• optional RAVE: all-moves-as-first statistics blended into selection
 """
 
 from __future__ import annotations
-import math, random, time, sys
-from dataclasses import dataclass, field
-from typing import Optional
+import heapq, math, random, time, sys, os
+import multiprocessing as mp
+from array import array
 
+from book import load_book
+from geometry import STANDARD
+from stats import SearchStats
 
-ROWS, COLS = 6, 7
-BITS_PER_COL = ROWS + 1                   
 
+# the standard 6x7 connect-4 board; a BitboardGame built with another
+# geometry.Geometry plays on that board instead
+ROWS, COLS = STANDARD.rows, STANDARD.cols
+BITS_PER_COL = STANDARD.bits_per_col
 
-COL_MASKS = [(1 << BITS_PER_COL) - 1 << (c * BITS_PER_COL) for c in range(COLS)]
-TOP_MASKS = [1 << (ROWS + c * BITS_PER_COL) for c in range(COLS)]
+
+COL_MASKS = STANDARD.col_masks
+TOP_MASKS = STANDARD.top_masks
+FULL_HEIGHTS = STANDARD.full_heights    # heights[c] of a full column
 
 def drop(bb, bit):
     return bb | (1 << bit)
 
-def is_win(bb):
-    m = bb & (bb >> 1)
-    if m & (m >> 2): return True
-    m = bb & (bb >> BITS_PER_COL)
-    if m & (m >> (2 * BITS_PER_COL)): return True
-    m = bb & (bb >> (BITS_PER_COL - 1))
-    if m & (m >> (2 * (BITS_PER_COL - 1))): return True
-    m = bb & (bb >> (BITS_PER_COL + 1))
-    return bool(m & (m >> (2 * (BITS_PER_COL + 1))))
+is_win = STANDARD.is_win
 
 
 class BitboardGame:
-    __slots__ = ("bb", "heights", "moves")
+    __slots__ = ("bb", "heights", "moves", "geo")
 
-    def __init__(self):
+    def __init__(self, geo = STANDARD):
+        self.geo = geo
         self.bb = [0, 0]                                    
-        self.heights = [c * BITS_PER_COL + 1 for c in range(COLS)]
+        self.heights = [c * geo.bits_per_col + 1 for c in range(geo.cols)]
         self.moves: list[int] = []
 
     def __str__(self):
-        gr = [["." for _ in range(COLS)] for _ in range(ROWS)]
-        for c in range(COLS):
-            bit = 1 << (c * BITS_PER_COL + 1)
-            for r in range(ROWS):
+        geo = self.geo
+        gr = [["." for _ in range(geo.cols)] for _ in range(geo.rows)]
+        for c in range(geo.cols):
+            bit = 1 << (c * geo.bits_per_col + 1)
+            for r in range(geo.rows):
                 if self.bb[0] & bit:gr[r][c]= "X"
                 if self.bb[1] & bit:gr[r][c] = "O"
                 bit <<= 1
-        rows = [" ".join(gr[r]) for r in reversed(range(ROWS))]
-        rows.append("0 1 2 3 4 5 6")
+        rows = [" ".join(gr[r]) for r in reversed(range(geo.rows))]
+        rows.append(" ".join(str(c % 10) for c in range(geo.cols)))
         return "\n".join(rows)
 
     @property
@@ -56,10 +64,11 @@ class BitboardGame:
 
     def legal_moves(self):
         occ = self.bb[0] | self.bb[1]
-        return [c for c in range(COLS) if not occ & TOP_MASKS[c]]
+        top = self.geo.top_masks
+        return [c for c in range(self.geo.cols) if not occ & top[c]]
 
     def play(self, col) -> None:
-        if col not in self.legal_moves():
+        if not 0 <= col < self.geo.cols or self.heights[col] == self.geo.full_heights[col]:
             raise ValueError(f"Column {col} is full")
         side = self.side_to_move
         bit = self.heights[col]
@@ -77,14 +86,24 @@ class BitboardGame:
         if not self.moves:
             return False, None
         last = self.side_to_move ^ 1
-        if is_win(self.bb[last]):           
+        if self.geo.is_win(self.bb[last]):           
             return True, last
-        if len(self.moves) == ROWS * COLS: 
+        if len(self.moves) == self.geo.size: 
             return True, None
         return False, None
 
+    def snapshot(self):
+        return self.bb[:], self.heights[:], len(self.moves)
+
+    def restore(self, snap):
+        """Take back every move made since snapshot() returned snap."""
+        bb, heights, n = snap
+        self.bb[:] = bb
+        self.heights[:] = heights
+        del self.moves[n:]
+
     def copy(self):
-        g = BitboardGame()
+        g = BitboardGame(self.geo)
         g.bb = self.bb[:]
         g.heights = self.heights[:]
         g.moves = self.moves[:]
@@ -92,165 +111,636 @@ class BitboardGame:
 
 
 EXPLORATION_C = math.sqrt(2)
-
-@dataclass
-class Node:
-    key: tuple[int, int]
-    heights_key: tuple[int, ...]
-    parent: "Node | None"
-    move_from_parent: int | None
-    player: int                      
-    wins: float = 0.0
-    visits: int = 0
-    untried: list[int] = field(default_factory=list)
-    children: dict[int, "Node"] = field(default_factory=dict)
-
-    def ucb(self):
-        if self.visits == 0:
-            return float("inf")
-        return self.wins/self.visits + EXPLORATION_C*math.sqrt(math.log(self.parent.visits) / self.visits)
-
-
-CENTER_ORDER = [3, 2, 4, 1, 5, 0, 6]    
-
-def random_policy(game, rng):
-    legal = game.legal_moves()
-    if rng.random() < 0.75:
-        for c in CENTER_ORDER:
-            if c in legal:
+INF = float("inf")
+COMPACT_SHARE = 0.25        # most of a search's remaining time a tree copy may use
+
+BOTTOM_MASK = STANDARD.bottom_mask
+BOARD_MASK = STANDARD.board_mask
+
+# threat masks of the standard board; g.geo has them for any other
+winning_cells = STANDARD.winning_cells
+playable = STANDARD.playable
+lowest_column = STANDARD.lowest_column
+
+def position_key(g):
+    # side-to-move stones plus one marker bit above every column's stack
+    cur = g.bb[g.side_to_move]
+    return cur + (g.bb[0] | g.bb[1]) + g.geo.bottom_mask
+
+def legal_mask(g):
+    occ = g.bb[0] | g.bb[1]
+    top = g.geo.top_masks
+    m = 0
+    for c in range(g.geo.cols):
+        if not occ & top[c]:
+            m |= 1 << c
+    return m
+
+
+class NodeArena:
+    """MCTS tree stored as parallel arrays; a node is an integer id.
+
+    wins[n] counts results for the player who made the move into n.
+    Children of n are first_child[n], next_sibling[...], ... ending at -1.
+    untried[n] is a bitmask of columns not yet expanded below n.
+    proven[n] is 1 when the player who moved into n has a forced win,
+    -1 when they have a forced loss and 0 while unknown.
+    amaf_visits[n] / amaf_wins[n] count the playouts in which the player
+    to move at n's parent took n's cell at any later point (RAVE).
+    Keys and untried masks too wide for a machine word go in lists.
+    """
+    __slots__ = ("visits", "wins", "parent", "first_child", "next_sibling",
+                 "move", "untried", "key", "proven", "amaf_visits", "amaf_wins", "geo")
+
+    def __init__(self, geo = STANDARD):
+        self.geo = geo
+        self.visits = array("l")
+        self.wins = array("d")
+        self.parent = array("l")
+        self.first_child = array("l")
+        self.next_sibling = array("l")
+        self.move = array("b")
+        self.untried = array("B") if geo.cols <= 8 else array("Q") if geo.cols <= 64 else []
+        self.key = array("Q") if geo.fits_64 else []
+        self.proven = array("b")
+        self.amaf_visits = array("l")
+        self.amaf_wins = array("d")
+
+    def __len__(self):
+        return len(self.visits)
+
+    def add(self, parent, move, untried, key):
+        n = len(self.visits)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.move.append(move)
+        self.untried.append(untried)
+        self.key.append(key)
+        self.proven.append(0)
+        self.amaf_visits.append(0)
+        self.amaf_wins.append(0.0)
+        if parent >= 0:
+            self.next_sibling.append(self.first_child[parent])
+            self.first_child[parent] = n
+        else:
+            self.next_sibling.append(-1)
+        return n
+
+    def children(self, n):
+        c = self.first_child[n]
+        while c != -1:
+            yield c
+            c = self.next_sibling[c]
+
+    def select(self, n, explore = EXPLORATION_C):
+        """Unproven child of n with the highest UCB1 value."""
+        visits, wins, sib, proven = self.visits, self.wins, self.next_sibling, self.proven
+        log_n = math.log(visits[n])
+        best, best_val = -1, -1.0
+        c = self.first_child[n]
+        while c != -1:
+            if proven[c]:
+                c = sib[c]
+                continue
+            v = visits[c]
+            if v == 0:
                 return c
+            val = wins[c] / v + explore * math.sqrt(log_n / v)
+            if val > best_val:
+                best, best_val = c, val
+            c = sib[c]
+        return best
+
+    def select_rave(self, n, explore, k, bias = None):
+        """Unproven child of n with the highest RAVE value.
+
+        The value is (1 - beta) * Q + beta * Q_amaf plus the UCB1 term.
+        beta is sqrt(k / (3 * visits + k)), or with bias given the
+        minimum-MSE schedule amaf / (visits + amaf + 4 * bias**2 * visits * amaf).
+        """
+        visits, wins, sib, proven = self.visits, self.wins, self.next_sibling, self.proven
+        a_visits, a_wins = self.amaf_visits, self.amaf_wins
+        b4 = None if bias is None else 4 * bias * bias
+        log_n = math.log(visits[n])
+        best, best_val = -1, -1.0
+        c = self.first_child[n]
+        while c != -1:
+            if proven[c]:
+                c = sib[c]
+                continue
+            v = visits[c]
+            if v == 0:
+                return c
+            q = wins[c] / v
+            na = a_visits[c]
+            if na:
+                beta = math.sqrt(k / (3 * v + k)) if b4 is None else na / (v + na + b4 * v * na)
+                q += beta * (a_wins[c] / na - q)
+            val = q + explore * math.sqrt(log_n / v)
+            if val > best_val:
+                best, best_val = c, val
+            c = sib[c]
+        return best
+
+
+CENTER_ORDER = STANDARD.center_order
+
+def random_policy(game, rng, avoid_threats = False):
+    geo = game.geo
+    mask = game.bb[0] | game.bb[1]
+    cells = geo.playable(mask)
+    if avoid_threats:
+        # stay out from under the opponent's threats while there is a choice;
+        # only tactical playouts pay for the threat mask
+        opp = game.bb[game.side_to_move ^ 1]
+        cells = cells & ~(geo.winning_cells(opp, mask) >> 1) or cells
+    col_masks = geo.col_masks
+    legal = [c for c in geo.center_order if cells & col_masks[c]]
+    if rng.random() < 0.75:
+        return legal[0]
     return rng.choice(legal)
 
 class MCTSAgent:
-    def __init__(self, time_limit = 1.2, tactical= False, rng = None):
-        self.time_limit = time_limit
+    def __init__(self, time_limit = 1.2, tactical= False, rng = None, leaf_rollouts = 1, vectorized = False,
+                 max_nodes = 2_000_000, book = None, stop = None, solver_threshold = 18, max_iterations = None,
+                 on_stats = None, profiler = None, node_budget = None, rave = None, rave_bias = None,
+                 exploration = EXPLORATION_C):
+        self.time_limit = time_limit                # seconds per search, None for no clock
+        # optional iteration and new-node budgets; unlike time_limit they
+        # give the same tree on every run under a seeded rng
+        self.max_iterations = max_iterations
+        self.node_budget = node_budget
+        self.book = book
+        self.solver_threshold = solver_threshold    # hand off to the exact solver at this many empty cells
+        self.solver = None
+        self.stop = stop            # optional object with is_set() that ends the search early
+        # node ceiling; when it is hit the least-visited half of the tree is dropped
+        self.max_nodes = max_nodes
         self.use_tactic = tactical
         self.rng = rng or random.Random()
-        self.tt: dict[tuple[int, int, tuple[int, ...]], Node] = {}
+        self.leaf_rollouts = leaf_rollouts      # playouts run per expanded leaf
+        # vectorized: run each leaf's playouts as one NumPy batch (plain
+        # random_policy playouts, the tactical policy is not applied; boards
+        # up to 64 bits only)
+        self.vectorized = vectorized
+        # rave: RAVE equivalence parameter k, None for plain UCT; rave_bias
+        # switches to the minimum-MSE beta schedule (see NodeArena.select_rave).
+        # AMAF counts come from the final board of every playout, so RAVE
+        # needs the scalar playouts.
+        if vectorized and (rave or rave_bias):
+            raise ValueError("RAVE needs the scalar playouts, not vectorized=True")
+        self.rave = rave
+        self.rave_bias = rave_bias
+        self.exploration = exploration
+        self._gen = None
+        self._batch_rollouts = None
+        self.arena = NodeArena()
+        self.tt: dict[int, int] = {}            # position_key -> node id
         self.last_root_visits = 0   
+        self.last_root_stats: dict[int, tuple[int, float]] = {}
+        self.last_iterations = 0
+        # on_stats(SearchStats) is called after every search; a
+        # stats.SamplingProfiler in profiler samples each search
+        self.on_stats = on_stats
+        self.profiler = profiler
+        self.last_stats = None
 
     def _tactic(self, g):
         if not self.use_tactic:
             return None
 
-        me, opp = g.side_to_move, g.side_to_move ^ 1
-        legal = g.legal_moves()
+        geo = g.geo
+        me, opp = g.bb[g.side_to_move], g.bb[g.side_to_move ^ 1]
+        mask = me | opp
+        play = geo.playable(mask)
 
-        for c in legal:
-            if is_win(drop(g.bb[me], g.heights[c])):
-                return c
+        win = geo.winning_cells(me, mask) & play
+        if win:
+            return geo.lowest_column(win)
 
-        for c in legal:
-            if is_win(drop(g.bb[opp], g.heights[c])):
-                return c
+        threat = geo.winning_cells(opp, mask)
+        if threat & play:
+            return geo.lowest_column(threat & play)
 
-        safe = []
-        for c in legal:
-            g.play(c)                      
-            gives_reply_win = False
-            for d in g.legal_moves():     
-                if is_win(drop(g.bb[opp], g.heights[d])):
-                    gives_reply_win = True
-                    break
-            g.undo()
-            if not gives_reply_win:
-                safe.append(c)
-        if len(safe) == 1:
-            return safe[0]
+        # a stone right under an opponent threat lets them win on top of it
+        safe = play & ~(threat >> 1)
+        if safe and not safe & (safe - 1):
+            return geo.lowest_column(safe)
         return None
 
+    def _book_move(self, root):
+        # the book and the solver only know the standard board
+        if self.book is None or root.geo is not STANDARD:
+            return None
+        hit = self.book.lookup(root)
+        if hit is None or hit[0] not in root.legal_moves():
+            return None
+        self.last_root_visits = 0
+        self.last_iterations = 0
+        self.last_root_stats = {hit[0]: (0, 0.0)}
+        return hit[0]
 
     def search(self, root):
+        stats = SearchStats("mcts")
+        start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            move = self._search(root, stats)
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+                stats.profile = self.profiler.top()
+        stats.elapsed = time.perf_counter() - start
+        stats.move = move
+        stats.iterations = self.last_iterations
+        stats.children = {c: (v, w / v if v else 0.0) for c, (v, w) in self.last_root_stats.items()}
+        self.last_stats = stats
+        if self.on_stats is not None:
+            self.on_stats(stats)
+        return move
+
+    def _search(self, root, stats):
+        t = time.perf_counter()
+        # re-rooting the reused tree counts against the budget too
+        deadline = INF if self.time_limit is None else t + self.time_limit
+        move = self._book_move(root)
+        if self.book is not None:
+            stats.phases["book"] = time.perf_counter() - t
+        if move is not None:
+            stats.source = "book"
+            return move
+        if root.geo is STANDARD and ROWS * COLS - len(root.moves) <= self.solver_threshold:
+            t = time.perf_counter()
+            if self.solver is None:
+                from solver import Solver
+                self.solver = Solver()
+            move, _ = self.solver.best_move(root)
+            stats.phases["solver"] = time.perf_counter() - t
+            stats.source = "solver"
+            self.last_root_visits = 0
+            self.last_iterations = 0
+            self.last_root_stats = {move: (0, 0.0)}
+            return move
         tac = self._tactic(root)
         if tac is not None:
+            stats.source = "tactic"
             self.last_root_visits = 0        
+            self.last_iterations = 0
+            self.last_root_stats = {tac: (0, 0.0)}
             return tac
 
-        root_key = self._key(root)
-        node = self.tt.get(root_key)
-        if not node:
-            node = Node(key=root_key[0], heights_key=root_key[1], parent=None, move_from_parent=None, player=0, untried=root.legal_moves()[:])
-            self.tt[root_key] = node
-
-        stop = time.time() + self.time_limit
-        while time.time() < stop:
-            g = root.copy()
-            n = node
-            while not n.untried and n.children:
-                n = max(n.children.values(), key=Node.ucb)
-                g.play(n.move_from_parent)
-
-            if n.untried:
-                while n.untried:                       
-                    c = self.rng.choice(n.untried)
-                    try:
-                        g.play(c)
-                        break
-                    except ValueError:
-                        n.untried.remove(c)
-                else:
-                    self._backprop(n, *g.terminal())
-                    continue
-
-                child_key = self._key(g)
-                child = self.tt.get(child_key)
-                if not child:
-                    child = Node(key=child_key[0], heights_key=child_key[1], parent=n, move_from_parent=c, player=n.player ^ 1, untried=g.legal_moves()[:])
-                    self.tt[child_key] = child
-                n.children[c] = child
-                n = child
-
-            term, winner = g.terminal()
-            while not term:
-                m = self._tactic(g)
-                if m is None:
-                    L = g.legal_moves()
-                    if not L: break
-                    m = random_policy(g, self.rng)
-                try:
-                    g.play(m)
-                except ValueError:
+        node = self._reroot(root, deadline)
+        arena = self.arena
+        visits, untried = arena.visits, arena.untried
+        clock = time.perf_counter
+        max_it = self.max_iterations or INF
+        node_budget = self.node_budget or INF
+        base_ply = len(root.moves)
+        cols = root.geo.cols
+        explore = self.exploration
+        rave = bool(self.rave or self.rave_bias)
+        path = masks = None
+        g = root.copy()                         # replayed from root every iteration
+        snap = g.snapshot()
+        it = rollouts = max_depth = created = 0
+        t_select = t_expand = t_rollout = t_backprop = 0.0
+        t0 = clock()
+        # at least one iteration, so the root always has a child to return;
+        # a proven root already has one and needs no more search.  The
+        # iteration and node budgets are exact.  The clock and the stop flag
+        # are checked every iteration too: t0 is the time the last one
+        # ended, and one iteration can run many playouts.
+        while not arena.proven[node]:
+            if it:
+                if it >= max_it or created >= node_budget:
                     break
+                if t0 > deadline or self.stop is not None and self.stop.is_set():
+                    break
+            it += 1
+            if len(arena) >= self.max_nodes:
+                self._compact(node, self.max_nodes // 2, deadline)
+                node = 0
+                arena = self.arena
+                visits, untried = arena.visits, arena.untried
+            n = node
+            if rave:
+                # tree nodes on the way down, and the stones on the board at each
+                path, masks = [n], [g.bb[0] | g.bb[1]]
+                while not untried[n] and arena.first_child[n] != -1:
+                    n = arena.select_rave(n, explore, self.rave, self.rave_bias)
+                    g.play(arena.move[n])
+                    path.append(n)
+                    masks.append(g.bb[0] | g.bb[1])
+            else:
+                while not untried[n] and arena.first_child[n] != -1:
+                    n = arena.select(n, explore)
+                    g.play(arena.move[n])
+            t1 = clock()
+
+            if untried[n]:
+                mask = untried[n]
+                c = self.rng.choice([c for c in range(cols) if mask >> c & 1])
+                untried[n] = mask & ~(1 << c)
+                g.play(c)
                 term, winner = g.terminal()
-
-            self._backprop(n, term, winner)
-
-        best_col, best_node = max(node.children.items(), key=lambda kv: kv[1].visits)
-        self.last_root_visits = best_node.parent.visits if best_node.parent else 0
-        return best_col
+                child_key = position_key(g)
+                n = arena.add(n, c, 0 if term else legal_mask(g), child_key)
+                created += 1
+                self.tt.setdefault(child_key, n)
+                if winner is not None:
+                    arena.proven[n] = 1
+                    self._prove(node, n)
+            if len(g.moves) - base_ply > max_depth:
+                max_depth = len(g.moves) - base_ply
+            t2 = clock()
+
+            mover = g.side_to_move ^ 1          # made the move into n
+            if self.vectorized:
+                res, count = self._batch_result(mover, g), self.leaf_rollouts
+            elif self.leaf_rollouts > 1:
+                leaf = g.snapshot()
+                res, count = 0.0, self.leaf_rollouts
+                for _ in range(count):
+                    winner = self._rollout(g)
+                    res += self._result(mover, winner)
+                    if rave:
+                        self._amaf(path, masks, g.bb, winner, base_ply)
+                    g.restore(leaf)
+            else:
+                winner = self._rollout(g)
+                res, count = self._result(mover, winner), 1
+                if rave:
+                    self._amaf(path, masks, g.bb, winner, base_ply)
+            g.restore(snap)
+            t3 = clock()
+
+            self._update(node, n, res, count)
+            rollouts += count
+            t4 = clock()
+            t_select += t1 - t0
+            t_expand += t2 - t1
+            t_rollout += t3 - t2
+            t_backprop += t4 - t3
+            t0 = t4
+
+        kids = list(arena.children(node))
+        proven = arena.proven
+        won = [c for c in kids if proven[c] == 1]
+        alive = [c for c in kids if proven[c] != -1]
+        if won:
+            move = arena.move[won[0]]
+        elif alive or not untried[node]:
+            move = arena.move[max(alive or kids, key=lambda c: visits[c])]
+        else:
+            # every tried move loses; an untried one might not
+            move = next(c for c in root.geo.center_order if untried[node] >> c & 1)
+        self.last_root_visits = visits[node]
+        self.last_root_stats = {arena.move[c]: (visits[c], arena.wins[c]) for c in kids}
+        self.last_iterations = it
+        stats.phases.update(selection=t_select, expansion=t_expand, rollout=t_rollout, backprop=t_backprop)
+        stats.rollouts = rollouts
+        stats.tree_size = len(arena)
+        stats.max_depth = max_depth
+        if proven[node]:
+            stats.score = -proven[node]        # for the side to move at the root
+        return move
+
+    def _reroot(self, root, deadline = INF):
+        """Node id for root, keeping only the subtree below it."""
+        root_key = position_key(root)
+        node = self.tt.get(root_key)
+        if node is None or self.arena.geo is not root.geo:
+            self.arena = NodeArena(root.geo)
+            self.tt = {root_key: 0}
+            return self.arena.add(-1, -1, legal_mask(root), root_key)
+        if node != 0 or self.arena.parent[0] != -1:
+            self._compact(node, len(self.arena), deadline)
+        return 0
+
+    def _compact(self, node, keep, deadline = INF):
+        """Copy the subtree under node into a fresh arena with node as id 0.
+
+        Nodes are copied most visited first, which always leaves a subtree
+        since no child has more visits than its parent.  Copying ends after
+        keep nodes, after COMPACT_SHARE of the time left before deadline, or
+        when the stop flag is set; a child left behind goes back into its
+        parent's untried mask.
+        """
+        old = self.arena
+        visits, wins, proven, key = old.visits, old.wins, old.proven, old.key
+        a_visits, a_wins = old.amaf_visits, old.amaf_wins
+        clock = time.perf_counter
+        now = clock()
+        until = now + COMPACT_SHARE * (deadline - now)
+        stop = self.stop
+        first_child, sib, move = old.first_child, old.next_sibling, old.move
+        push, pop = heapq.heappush, heapq.heappop
+
+        new = NodeArena(old.geo)
+        tt = {}
+        heap = [(-visits[node], node, -1)]
+        copied = 0
+        while heap and copied < keep:
+            if copied and not copied & 1023 and (clock() > until or stop is not None and stop.is_set()):
+                break
+            _, n, new_parent = pop(heap)
+            m = new.add(new_parent, move[n] if new_parent >= 0 else -1, old.untried[n], key[n])
+            new.visits[m] = visits[n]
+            new.wins[m] = wins[n]
+            new.proven[m] = proven[n]
+            new.amaf_visits[m] = a_visits[n]
+            new.amaf_wins[m] = a_wins[n]
+            tt.setdefault(key[n], m)
+            c = first_child[n]
+            while c != -1:
+                push(heap, (-visits[c], c, m))
+                c = sib[c]
+            copied += 1
+        for _, c, new_parent in heap:
+            new.untried[new_parent] |= 1 << move[c]
+        self.arena = new
+        self.tt = tt
+
+    def _batch_result(self, mover, g):
+        if self._gen is None:
+            import numpy as np
+            from rollouts import batch_rollouts
+            self._gen = np.random.default_rng(self.rng.getrandbits(64))
+            self._batch_rollouts = batch_rollouts
+        wins = self._batch_rollouts(g, self.leaf_rollouts, self._gen)
+        return wins[mover] + 0.5 * wins[2]
+
+    def _rollout(self, g):
+        tactical = self.use_tactic
+        term, winner = g.terminal()
+        while not term:
+            m = self._tactic(g)
+            if m is None:
+                m = random_policy(g, self.rng, tactical)
+            g.play(m)
+            term, winner = g.terminal()
+        return winner
 
 
-    def _backprop(self, n, term, winner):
+    def _result(self, mover, winner):
         if winner is None:
-            res = 0.5
-        else:
-            if winner == n.player:
-                res = 1.0
+            return 0.5
+        return 1.0 if winner == mover else 0.0
+
+    def _prove(self, root, n):
+        """Carry the proven value of n up towards root while it decides the parent."""
+        arena = self.arena
+        proven, parent, untried = arena.proven, arena.parent, arena.untried
+        while n != root:
+            p = parent[n]
+            if proven[n] == 1:
+                proven[p] = -1           # the side to move at p can win from here
+            elif untried[p] or any(proven[c] != -1 for c in arena.children(p)):
+                break
             else:
-                res = 0.0
+                proven[p] = 1            # every reply loses for the side to move at p
+            n = p
+
+    def _amaf(self, path, masks, bb, winner, base_ply):
+        """All-moves-as-first update from one playout's final board bb.
+
+        A child of path[i] scores when the player to move there owns the
+        child's cell at the end: stones never move, so they took it at some
+        point after path[i], in the tree or in the playout.
+        """
+        arena = self.arena
+        a_visits, a_wins = arena.amaf_visits, arena.amaf_wins
+        first, sib, move = arena.first_child, arena.next_sibling, arena.move
+        geo = arena.geo
+        col_masks, playable = geo.col_masks, geo.playable
+        for i, n in enumerate(path):
+            side = (base_ply + i) & 1
+            hits = playable(masks[i]) & bb[side]
+            if not hits:
+                continue
+            res = 0.5 if winner is None else 1.0 if winner == side else 0.0
+            c = first[n]
+            while c != -1:
+                if hits & col_masks[move[c]]:
+                    a_visits[c] += 1
+                    a_wins[c] += res
+                c = sib[c]
+
+    def _update(self, root, n, res, count):
+        # res is the summed result of count playouts for the player who
+        # moved into n; it flips sides on the way up to the search root
+        visits, wins, parent = self.arena.visits, self.arena.wins, self.arena.parent
+        while True:
+            visits[n] += count
+            wins[n] += res
+            if n == root:
+                break
+            res = count - res
+            n = parent[n]
 
-        while n:
-            n.visits += 1
-            n.wins += res
-            res = 1.0 - res
-            n = n.parent
 
-    def _key(self, g):
-        p = g.side_to_move
-        return (g.bb[p], g.bb[p ^ 1]), tuple(g.heights)
+def _search_worker(conn, tactical, vectorized):
+    # one warm agent per process; its tt carries over between searches
+    agent = MCTSAgent(tactical=tactical, vectorized=vectorized)
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        moves, time_limit, seed, leaf_rollouts, geo = msg
+        agent.time_limit = time_limit
+        agent.leaf_rollouts = leaf_rollouts
+        agent.rng.seed(seed)
+        agent._gen = None
+        g = BitboardGame(geo)
+        for c in moves:
+            g.play(c)
+        agent.search(g)
+        conn.send(agent.last_root_stats)
+    conn.close()
+
+
+class ParallelMCTSAgent:
+    """Root-parallel MCTS: every worker process grows its own tree from the
+    same root with its own seed, and the root child visits/wins are summed
+    before the move is chosen.  Workers start on the first search and stay
+    alive until close()."""
+
+    def __init__(self, workers = None, time_limit = 1.2, tactical = False, rng = None, leaf_rollouts = 1, vectorized = False,
+                 book = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.use_tactic = tactical
+        self.rng = rng or random.Random()
+        self.leaf_rollouts = leaf_rollouts
+        self.vectorized = vectorized
+        self.book = book
+        self.last_root_visits = 0
+        self.last_root_stats: dict[int, tuple[int, float]] = {}
+        self._procs = []
+        self._conns = []
+
+    def _start(self):
+        if self._procs:
+            return
+        for _ in range(self.workers):
+            parent, child = mp.Pipe()
+            p = mp.Process(target=_search_worker, args=(child, self.use_tactic, self.vectorized), daemon=True)
+            p.start()
+            child.close()
+            self._procs.append(p)
+            self._conns.append(parent)
+
+    _book_move = MCTSAgent._book_move
+
+    def search(self, root):
+        move = self._book_move(root)
+        if move is not None:
+            return move
+        self._start()
+        for conn in self._conns:
+            conn.send((root.moves[:], self.time_limit, self.rng.getrandbits(64), self.leaf_rollouts, root.geo))
+        merged: dict[int, list] = {}
+        for conn in self._conns:
+            for c, (visits, wins) in conn.recv().items():
+                tot = merged.setdefault(c, [0, 0.0])
+                tot[0] += visits
+                tot[1] += wins
+        self.last_root_stats = {c: (v, w) for c, (v, w) in merged.items()}
+        self.last_root_visits = sum(v for v, _ in self.last_root_stats.values())
+        return max(merged, key=lambda c: merged[c][0])
+
+    def close(self):
+        for conn in self._conns:
+            conn.send(None)
+            conn.close()
+        for p in self._procs:
+            p.join()
+        self._procs, self._conns = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 def human_vs_ai():
+    from ponder import Ponderer
     print("Connect-4 – you are O (second).  Type column 0-6.")
     seed = int(time.time())
     random.seed(seed)
     print(f"[debug] random seed = {seed}")
 
     g = BitboardGame()
-    ai = MCTSAgent(time_limit=5, tactical=True)   
+    ai = MCTSAgent(time_limit=5, tactical=True, book=load_book())   
+    # the AI keeps searching while you think
+    ponder = Ponderer(ai)
 
     while True:
-        col = ai.search(g)
+        col = ponder.search(g)
         g.play(col)
         print(f"\nAI drops in column {col}\n{g}\n")
         over, win = g.terminal()
@@ -258,6 +748,7 @@ def human_vs_ai():
             print("AI wins!" if win == 0 else "Draw.")
             break
 
+        ponder.start(g)
         legal = g.legal_moves()
         move = input(f"Your move {legal}: ")
         while True:
@@ -271,6 +762,7 @@ def human_vs_ai():
         print(g, "\n")
         over, win = g.terminal()
         if over:
+            ponder.stop()
             print("You win!" if win == 1 else "Draw.")
             break
 
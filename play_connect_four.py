@@ -1,9 +1,19 @@
-import numpy as np
+"""pygame front end for the Connect-4 engines.
+
+    python play_connect_four.py               human (red) vs the alpha-beta AI
+    python play_connect_four.py --two-player  two humans on one board
+
+The AI searches on a worker thread, so the window keeps answering while it
+thinks; Escape makes it play its best move so far and closing the window
+cancels the search.  Only the cells that change are redrawn.
+"""
+import sys, threading
+
 import pygame
-import sys
 
-ROWS = 6
-COLS = 7
+from connect_4_playing_ai import ROWS, COLS, HUMAN_PIECE, AI_PIECE, Position, AlphaBetaAgent
+from book import load_book
+from ponder import Ponderer
 
 
 BLUE = (0, 0, 255)
@@ -11,94 +21,153 @@ BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 
-pygame.init()   
 SQUARESIZE = 100
 CIRCLE_RADIUS = int(SQUARESIZE/2 - 5)
 width = COLS * SQUARESIZE
 height = (ROWS + 1) * SQUARESIZE
-screen = pygame.display.set_mode((width,height))
-clock = pygame.time.Clock()
+FPS = 30
+COLORS = {0: BLACK, HUMAN_PIECE: RED, AI_PIECE: YELLOW}
+
+# set up by init_display(), not at import
+screen = None
+clock = None
 
 
+def init_display():
+    global screen, clock
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((width, height))
+        clock = pygame.time.Clock()
 
-board = np.zeros((ROWS,COLS))
 
+def draw_cell(r, c, piece):
+    """Draw cell (r, c), r counted from the top; returns its screen rect."""
+    rect = pygame.Rect(c * SQUARESIZE, r * SQUARESIZE + SQUARESIZE, SQUARESIZE, SQUARESIZE)
+    pygame.draw.rect(screen, BLUE, rect)
+    pygame.draw.circle(screen, COLORS[piece], rect.center, CIRCLE_RADIUS)
+    return rect
 
 
-        
 def draw_board(board):
     for c in range(COLS):
         for r in range(ROWS):
-            pygame.draw.rect(screen, BLUE, (c * SQUARESIZE, r * SQUARESIZE + SQUARESIZE, SQUARESIZE, SQUARESIZE ))
-            if board[r][c] == 0:
-                pygame.draw.circle(screen, BLACK, (int(c * SQUARESIZE + SQUARESIZE/2), int(r* SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), CIRCLE_RADIUS)
-            elif board[r][c] == 1:
-                pygame.draw.circle(screen, RED, (int(c * SQUARESIZE + SQUARESIZE/2), int(r* SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), CIRCLE_RADIUS)
-            else :
-                pygame.draw.circle(screen, YELLOW, (int(c * SQUARESIZE + SQUARESIZE/2), int(r* SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), CIRCLE_RADIUS)
+            draw_cell(r, c, int(board[r][c]))
 
     pygame.display.update()
 
-def drop_piece(board,col, piece):
-    for r in range(ROWS-1, -1, -1):
-        if board[r][col] == 0:
-            board[r][col] = piece
-            return True
-    return False
-
-def winning_move(board, player_piece): #TODO: change this so it only checks the last move made
-	# Check horizontally
-	for c in range(COLS-3):
-		for r in range(ROWS):
-			if board[r][c] == player_piece and board[r][c+1] == player_piece and board[r][c+2] == player_piece and board[r][c+3] == player_piece:
-				return True
-
-	# Check vertically
-	for c in range(COLS):
-		for r in range(ROWS-3):
-			if board[r][c] == player_piece and board[r+1][c] == player_piece and board[r+2][c] == player_piece and board[r+3][c] == player_piece:
-				return True
-
-	# Check diagonally (positively sloped)
-	for c in range(COLS-3):
-		for r in range(ROWS-3):
-			if board[r][c] == player_piece and board[r+1][c+1] == player_piece and board[r+2][c+2] == player_piece and board[r+3][c+3] == player_piece:
-				return True
-
-	# Check diagonally (negatively sloped)
-	for c in range(COLS-3):
-		for r in range(3, ROWS):
-			if board[r][c] == player_piece and board[r-1][c+1] == player_piece and board[r-2][c+2] == player_piece and board[r-3][c+3] == player_piece:
-				return True
-
-
-def play_game():
+
+def draw_status(label=None):
+    """Clear the bar above the board and show label (a rendered surface) in it."""
+    rect = pygame.Rect(0, 0, width, SQUARESIZE)
+    screen.fill(BLACK, rect)
+    if label is not None:
+        screen.blit(label, (40, 10))
+    pygame.display.update(rect)
+
+
+class BackgroundSearch:
+    """ponder.search on a copy of the position, on a worker thread."""
+
+    def __init__(self, ponder, position):
+        pos = Position(position.geo)
+        for col in position.moves:
+            pos.play(col)
+        self.move = None
+        self._thread = threading.Thread(target=self._run, args=(ponder, pos), daemon=True)
+        self._thread.start()
+
+    def _run(self, ponder, pos):
+        self.move = ponder.search(pos)
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def join(self):
+        self._thread.join()
+
+
+def play_game(vs_ai=True):
+    init_display()
     myfont = pygame.font.SysFont("monospace", 75)
-    draw_board(board)
+    smallfont = pygame.font.SysFont("monospace", 40)
+    position = Position()
+    # set to end a running search: Escape plays the best move so far, quitting drops it
+    cancel = threading.Event()
+    agent = AlphaBetaAgent(time_limit=1.0, book=load_book(), on_stats=print, stop=cancel) if vs_ai else None
+    # the AI searches on the human's time too
+    ponder = Ponderer(agent) if vs_ai else None
+    search = None
+    status = None
+    draw_board(position.to_array())
     game_over = False
-    turn = 0
 
     while not game_over:
+        clock.tick(FPS)
+        col = None
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                cancel.set()
+                if search is not None:
+                    search.join()
+                if ponder is not None:
+                    ponder.stop()
+                pygame.quit()
                 sys.exit()
-        
-            player_piece = turn % 2 + 1
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                posx = event.pos[0]
-                col = int(posx // SQUARESIZE)
-                drop_piece(board, col, player_piece)
-                turn += 1
-                if winning_move(board, player_piece):
-                    if player_piece == 1:
-                        label = myfont.render("Player 1 wins!", 1, RED)
-                    else:
-                        label = myfont.render("Player 2 wins!", 1, YELLOW)
-                        screen.blit(label, (40,10))
-                        game_over = True
-                turn += 1
-                draw_board(board)
-
-    #show the final board state before closing
-    pygame.time.wait(3000)
\ No newline at end of file
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and search is not None:
+                cancel.set()
+            human = agent is None or position.piece_to_move == HUMAN_PIECE
+            if human and col is None and event.type == pygame.MOUSEBUTTONDOWN:
+                c = int(event.pos[0] // SQUARESIZE)
+                if position.can_play(c):
+                    col = c
+
+        if col is None and agent is not None and position.piece_to_move == AI_PIECE:
+            if search is None:
+                cancel.clear()
+                search = BackgroundSearch(ponder, position)
+            elif search.done():
+                col, search = search.move, None
+            text = "thinking" + "." * (pygame.time.get_ticks() // 400 % 4) if search else None
+            if text != status:
+                status = text
+                draw_status(text and smallfont.render(text, 1, YELLOW))
+        if col is None:
+            continue
+
+        player_piece = position.piece_to_move
+        color = RED if player_piece == 1 else YELLOW
+        # the new stone's row, counted from the top like the numpy board
+        geo = position.geo
+        row = geo.rows - (position.heights[col] - col * geo.bits_per_col)
+        position.play(col)
+        pygame.display.update(draw_cell(row, col, player_piece))
+
+        if position.last_move_won():
+            draw_status(myfont.render(f"Player {player_piece} wins!", 1, color))
+            game_over = True
+        elif position.is_full():
+            draw_status(myfont.render("It's a draw!", 1, color))
+            game_over = True
+        if game_over:
+            if ponder is not None:
+                ponder.stop()
+            break
+        if agent is not None and player_piece == AI_PIECE:
+            ponder.start(position)
+
+    # show the final board state before closing, still answering the window
+    end = pygame.time.get_ticks() + 3000
+    while pygame.time.get_ticks() < end:
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            break
+        clock.tick(FPS)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    play_game(vs_ai="--two-player" not in argv)
+
+
+if __name__ == "__main__":
+    main()
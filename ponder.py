@@ -0,0 +1,84 @@
+"""
+ponder.py  –  search on the opponent's time
+• Ponderer runs agent.search on the position with the opponent to move,
+  in a background thread, until the opponent's move arrives
+• works with AlphaBetaAgent (the transposition table stays warm) and
+  MCTSAgent (the next search re-roots the pondered tree on the actual move)
+• the reply's time budget is reduced by the ponder time spent on the move
+  that was actually played
+"""
+
+from __future__ import annotations
+import threading, time
+
+
+class Ponderer:
+    def __init__(self, agent, min_time = 0.05):
+        self.agent = agent
+        self.min_time = min_time            # the reply always searches at least this long
+        self._thread = None
+        self._flag = threading.Event()
+        self._moves = None
+        self._saved = None
+        self.elapsed = 0.0
+        self.stats = None                   # SearchStats of the last ponder search
+
+    def start(self, pos):
+        """Ponder on pos, where it is the opponent's turn."""
+        self.stop()
+        g = type(pos)(pos.geo)
+        for col in pos.moves:
+            g.play(col)
+        agent = self.agent
+        self._moves = list(pos.moves)
+        self._saved = (agent.time_limit, agent.stop, agent.on_stats)
+        agent.time_limit, agent.stop, agent.on_stats = None, self._flag, None
+        self._flag.clear()
+        self.stats = None
+        self._thread = threading.Thread(target=self._run, args=(g,), daemon=True)
+        self._thread.start()
+
+    def _run(self, g):
+        start = time.perf_counter()
+        try:
+            self.agent.search(g)
+            self.stats = self.agent.last_stats
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def stop(self):
+        """End the ponder search, if one runs, and give the agent its settings back."""
+        if self._thread is None:
+            return
+        self._flag.set()
+        self._thread.join()
+        self._thread = None
+        self.agent.time_limit, self.agent.stop, self.agent.on_stats = self._saved
+
+    def credit(self, move):
+        """Seconds of the last ponder search that went into move."""
+        st = self.stats
+        if st is None:
+            return 0.0
+        if st.children:
+            # MCTS: the share of root visits below the move, which now roots the tree
+            total = sum(v for v, _ in st.children.values())
+            share = st.children.get(move, (0, 0.0))[0] / total if total else 0.0
+        else:
+            # alpha-beta: the table holds a full search of the expected move only
+            share = 1.0 if st.move == move else 0.0
+        return self.elapsed * share
+
+    def search(self, pos):
+        """Stop pondering and search pos, one move after the pondered position."""
+        pondered = self._thread is not None and self._moves == pos.moves[:-1]
+        self.stop()
+        agent = self.agent
+        if not pondered or agent.time_limit is None:
+            return agent.search(pos)
+        base = agent.time_limit
+        agent.time_limit = max(self.min_time, base - self.credit(pos.moves[-1]))
+        try:
+            return agent.search(pos)
+        finally:
+            agent.time_limit = base
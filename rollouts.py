@@ -0,0 +1,73 @@
+"""
+rollouts.py  –  lockstep vectorized playouts for monte.MCTSAgent
+• thousands of random games from one position as NumPy uint64 bitboards
+• every game advances one ply per step, so the side to move is shared
+• any geometry whose bitboards fit 64 bits; wider boards need the scalar playouts
+"""
+
+from __future__ import annotations
+import numpy as np
+
+from geometry import STANDARD
+
+_ONE = np.uint64(1)
+
+
+def is_win_many(bb, geo = STANDARD):
+    """geo.is_win for an array of uint64 bitboards; returns a bool array."""
+    won = np.zeros(bb.shape, dtype=bool)
+    for steps in geo.win_steps:
+        m = bb
+        for k in steps:
+            m = m & (m >> np.uint64(k))
+        won |= m != 0
+    return won
+
+
+def batch_rollouts(game, n, gen, center_bias = 0.75):
+    """Play n random games to the end from game (a monte.BitboardGame).
+
+    Moves follow the plain monte.random_policy: with probability center_bias
+    the most central legal column, otherwise a uniform legal column.  The
+    scalar playouts of a tactical MCTSAgent differ: they take wins, block
+    threats and stay out from under the opponent's threats.
+    gen is a numpy.random.Generator.  Returns (wins_0, wins_1, draws).
+    """
+    geo = game.geo
+    if not geo.fits_64:
+        raise ValueError(f"vectorized playouts need 64-bit bitboards, not {geo}")
+    # a column can take another stone while its height bit is at most last_bit
+    last_bit = np.array([c * geo.bits_per_col + geo.rows for c in range(geo.cols)], dtype=np.uint64)
+    center = np.array(geo.center_order)
+    over, winner = game.terminal()
+    if over:
+        if winner is None:
+            return 0, 0, n
+        return (n, 0, 0) if winner == 0 else (0, n, 0)
+
+    bb = np.array([[game.bb[0]] * n, [game.bb[1]] * n], dtype=np.uint64)
+    heights = np.tile(np.array(game.heights, dtype=np.uint64), (n, 1))
+    live = np.arange(n)
+    wins = [0, 0]
+    side = game.side_to_move
+    ply = len(game.moves)
+    while ply < geo.size and len(live):
+        m = len(live)
+        h = heights[live]
+        legal = h <= last_bit
+        r = gen.random((m, geo.cols))
+        r[~legal] = -1.0
+        col = r.argmax(axis=1)
+        central = center[legal[:, center].argmax(axis=1)]
+        col = np.where(gen.random(m) < center_bias, central, col)
+
+        rows = np.arange(m)
+        stones = bb[side, live] | (_ONE << h[rows, col])
+        bb[side, live] = stones
+        heights[live, col] = h[rows, col] + _ONE
+        won = is_win_many(stones, geo)
+        wins[side] += int(won.sum())
+        live = live[~won]
+        side ^= 1
+        ply += 1
+    return wins[0], wins[1], len(live)
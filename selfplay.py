@@ -0,0 +1,204 @@
+"""
+selfplay.py  –  MCTS self-play training data in fixed-size binary records
+• a pool of worker processes plays games with MCTSAgent and BitboardGame
+• every position is streamed to the worker's own shard files as it is labelled
+• shards are a 16-byte header plus packed records, so np.memmap opens them as is
+• python selfplay.py --games 10000 --iterations 800 --out selfplay/
+
+Record (48 bytes, little endian):
+    bb       2 x uint64   stones of side 0 and side 1, monte bitboard layout
+    side     uint8        side to move
+    ply      uint8        moves played so far
+    outcome  int8         final result for the side to move: 1, 0 or -1
+    (pad)    uint8
+    visits   7 x uint32   root visits per column; a book, solver or tactic
+                          move is stored as a single visit
+"""
+
+from __future__ import annotations
+import glob, mmap, os, random, struct, time
+import multiprocessing as mp
+
+from monte import ROWS, COLS, BitboardGame, MCTSAgent
+
+MAGIC = b"C4SP"
+HEADER = struct.Struct("<4sBBH8x")        # magic, rows, cols, record size
+RECORD = struct.Struct(f"<QQBBbx{COLS}I")
+CHUNK = 1 << 16                           # records per shard
+SUFFIX = ".c4sp"
+
+
+def record_dtype():
+    import numpy as np
+    return np.dtype([("bb", "<u8", (2,)), ("side", "u1"), ("ply", "u1"), ("outcome", "i1"),
+                     ("pad", "u1"), ("visits", "<u4", (COLS,))])
+
+
+# --- writing -----------------------------------------------------------------
+
+class ShardWriter:
+    """Appends records to prefix-00000.c4sp, prefix-00001.c4sp, ... with at
+    most chunk records per file.  Every write is flushed, so the shards on
+    disk are always readable, even while the writer is running."""
+
+    def __init__(self, prefix, chunk = CHUNK):
+        self.prefix = prefix
+        self.chunk = chunk
+        self.index = 0
+        self.count = 0
+        self._file = None
+
+    def _open(self):
+        self._file = open(f"{self.prefix}-{self.index:05d}{SUFFIX}", "wb")
+        self._file.write(HEADER.pack(MAGIC, ROWS, COLS, RECORD.size))
+        self.count = 0
+
+    def write(self, records):
+        for rec in records:
+            if self._file is None or self.count == self.chunk:
+                if self._file is not None:
+                    self._file.close()
+                    self.index += 1
+                self._open()
+            self._file.write(RECORD.pack(*rec))
+            self.count += 1
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def play_game(agent, rng, temperature_plies = 8):
+    """Records (without outcome) and the winner of one self-play game.
+
+    For the first temperature_plies moves the move is sampled in
+    proportion to root visits, so games do not repeat; later moves are
+    the agent's choice.
+    """
+    g = BitboardGame()
+    rows = []
+    while True:
+        best = agent.search(g)
+        visits = [0] * COLS
+        for c, (v, _) in agent.last_root_stats.items():
+            visits[c] = v
+        if not any(visits):
+            visits[best] = 1
+        rows.append((g.bb[0], g.bb[1], g.side_to_move, len(g.moves), visits))
+        move = best
+        if len(g.moves) < temperature_plies and sum(visits) > 1:
+            move = rng.choices(range(COLS), weights=visits)[0]
+        g.play(move)
+        over, winner = g.terminal()
+        if over:
+            return rows, winner
+
+
+_writer = None
+_agent = None
+
+
+def _init_worker(out_dir, chunk, iterations, tactical):
+    global _writer, _agent
+    # a run stamp as well as the pid, so a later run never overwrites shards
+    _writer = ShardWriter(os.path.join(out_dir, f"shard-{int(time.time())}-{os.getpid()}"), chunk)
+    _agent = MCTSAgent(time_limit=None, max_iterations=iterations, tactical=tactical,
+                       solver_threshold=0)
+
+
+def _play(seed):
+    rng = random.Random(seed)
+    _agent.rng.seed(rng.getrandbits(64))
+    rows, winner = play_game(_agent, rng)
+    _writer.write((b0, b1, side, ply, 0 if winner is None else (1 if winner == side else -1), *visits)
+                  for b0, b1, side, ply, visits in rows)
+    return len(rows), winner
+
+
+def generate(games, out_dir = "selfplay", iterations = 800, workers = None, seed = 0,
+             tactical = True, chunk = CHUNK):
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(games)]
+    positions = 0
+    tally = {0: 0, 1: 0, None: 0}
+    start = time.time()
+    pool = mp.Pool(workers, initializer=_init_worker, initargs=(out_dir, chunk, iterations, tactical))
+    try:
+        for i, (n, winner) in enumerate(pool.imap_unordered(_play, seeds), 1):
+            positions += n
+            tally[winner] += 1
+            if i % 100 == 0 or i == games:
+                rate = positions / (time.time() - start)
+                print(f"{i}/{games} games, {positions} positions ({rate:.0f}/s)  "
+                      f"first {tally[0]} second {tally[1]} draw {tally[None]}")
+    finally:
+        pool.close()
+        pool.join()
+    return positions
+
+
+# --- reading -----------------------------------------------------------------
+
+def shard_paths(path):
+    """Shard files under a directory (sorted), or [path] for a single file."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*" + SUFFIX)))
+    return [path]
+
+
+def _check_header(head, path):
+    magic, rows, cols, size = HEADER.unpack(head)
+    if magic != MAGIC or (rows, cols) != (ROWS, COLS) or size != RECORD.size:
+        raise ValueError(f"{path}: not a {ROWS}x{COLS} self-play shard")
+
+
+def open_shard(path):
+    """The records of one shard as a read-only NumPy memmap."""
+    import numpy as np
+    with open(path, "rb") as f:
+        _check_header(f.read(HEADER.size), path)
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if not count:
+        return np.zeros(0, dtype=record_dtype())
+    return np.memmap(path, dtype=record_dtype(), mode="r", offset=HEADER.size, shape=(count,))
+
+
+def iter_records(path):
+    """(bb0, bb1, side, ply, outcome, visits) tuples, one shard mapped at a
+    time; needs no NumPy."""
+    for p in shard_paths(path):
+        with open(p, "rb") as f:
+            _check_header(f.read(HEADER.size), p)
+            if os.fstat(f.fileno()).st_size < HEADER.size + RECORD.size:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = HEADER.size + (len(mm) - HEADER.size) // RECORD.size * RECORD.size
+                for off in range(HEADER.size, end, RECORD.size):
+                    b0, b1, side, ply, outcome, *visits = RECORD.unpack_from(mm, off)
+                    yield b0, b1, side, ply, outcome, visits
+
+
+def iter_batches(path, batch = 4096):
+    """Structured NumPy arrays of at most batch records, shard by shard."""
+    for p in shard_paths(path):
+        arr = open_shard(p)
+        for i in range(0, len(arr), batch):
+            yield arr[i:i + batch]
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="generate Connect-4 self-play data")
+    ap.add_argument("--games", type=int, default=1000)
+    ap.add_argument("--iterations", type=int, default=800, help="MCTS iterations per move")
+    ap.add_argument("--out", default="selfplay")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--chunk", type=int, default=CHUNK, help="records per shard file")
+    ap.add_argument("--plain", action="store_true", help="random playouts without the tactical policy")
+    a = ap.parse_args()
+    generate(a.games, a.out, a.iterations, a.workers, a.seed, not a.plain, a.chunk)
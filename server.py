@@ -0,0 +1,292 @@
+"""
+server.py  –  asyncio Connect-4 engine server
+• many concurrent games over TCP or a Unix socket, one line per command
+• searches run on a shared pool of warm engine processes
+• per-game engine clock, bounded number of searches in flight
+
+Protocol (client -> server, one command per line):
+
+    new [minimax|mcts]        start a new game, optionally picking the engine
+    engine minimax|mcts       switch engine for this game
+    position [MOVES]          set the game to MOVES, a string of columns "3342"
+    clock MS [INC_MS]         give the engine a time bank for this game
+    go [movetime MS]          search; answered later with "bestmove C"
+    stop                      finish the running search now
+    isready                   -> readyok
+    quit
+
+Replies are "ok", "readyok", "bestmove C", "info ..." and "error ...".
+Without movetime, go budgets from the game clock when one is set and
+uses --movetime otherwise.
+
+    python server.py --port 4440 --workers 8
+    python server.py --unix /tmp/c4.sock
+"""
+
+from __future__ import annotations
+import asyncio, os, random, time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+from geometry import STANDARD
+
+# the server plays the standard board only
+ROWS, COLS = STANDARD.rows, STANDARD.cols
+ENGINES = ("minimax", "mcts")
+MIN_BUDGET = 0.01          # seconds; a search always gets at least this
+
+# --- worker side -------------------------------------------------------------
+
+_agents: dict = {}
+_flags = None
+
+
+def _init_worker(flags):
+    global _flags
+    _flags = flags
+
+
+class _StopFlag:
+    __slots__ = ("slot",)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def is_set(self):
+        return _flags[self.slot] != 0
+
+
+def _agent(engine):
+    # agents live as long as the worker, so the alpha-beta table, the MCTS
+    # tree and the opening book mapping carry over between searches
+    agent = _agents.get(engine)
+    if agent is None:
+        from book import load_book
+        if engine == "minimax":
+            from connect_4_playing_ai import AlphaBetaAgent
+            agent = AlphaBetaAgent(book=load_book())
+        else:
+            from monte import MCTSAgent
+            agent = MCTSAgent(tactical=True, book=load_book())
+        _agents[engine] = agent
+    return agent
+
+
+def _search(engine, moves, budget, slot, seed):
+    agent = _agent(engine)
+    agent.time_limit = budget
+    agent.stop = _StopFlag(slot)
+    if engine == "minimax":
+        from connect_4_playing_ai import Position
+        g = Position()
+    else:
+        from monte import BitboardGame
+        g = BitboardGame()
+        agent.rng.seed(seed)
+    for c in moves:
+        g.play(c)
+    start = time.perf_counter()
+    move = agent.search(g)
+    elapsed = time.perf_counter() - start
+    st = agent.last_stats
+    if engine == "minimax":
+        info = f"depth {st.depth} score {st.score} nodes {st.nodes} nps {st.nodes_per_s:.0f}"
+    else:
+        info = f"visits {agent.last_root_visits} iterations {st.iterations} nodes {st.tree_size}"
+    return move, elapsed, info
+
+
+# --- server side -------------------------------------------------------------
+
+class Session:
+    def __init__(self, engine = "minimax"):
+        self.engine = engine
+        self.moves: list[int] = []
+        self.clock: float | None = None      # engine time bank, seconds
+        self.increment = 0.0
+        self.task: asyncio.Task | None = None
+        self.slot: int | None = None
+        self.stopped = False
+
+    def budget(self, default):
+        if self.clock is None:
+            return default
+        left = max(1, (ROWS * COLS - len(self.moves) + 1) // 2)
+        return max(MIN_BUDGET, min(self.clock * 0.9, self.clock / left + self.increment))
+
+
+class EngineServer:
+    def __init__(self, workers = None, max_inflight = None, movetime = 1.0):
+        self.workers = workers or os.cpu_count() or 1
+        # backpressure: at most this many searches queued or running
+        self.max_inflight = max_inflight or 4 * self.workers
+        self.movetime = movetime
+        self.flags = mp.Array("b", self.max_inflight, lock=False)
+        self.free_slots = list(range(self.max_inflight))
+        self.slots = asyncio.Semaphore(self.max_inflight)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.flags,))
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        s = Session()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                if words[0] == "quit":
+                    break
+                reply = self.command(s, words, writer)
+                if reply:
+                    writer.write((reply + "\n").encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            if s.task is not None:
+                self._stop(s)
+                s.task.cancel()
+            writer.close()
+
+    def command(self, s, words, writer):
+        cmd, args = words[0], words[1:]
+        busy = s.task is not None and not s.task.done()
+        if cmd == "isready":
+            return "readyok"
+        if cmd == "stop":
+            self._stop(s)
+            return None
+        if busy:
+            return "error search running, send stop first"
+        if cmd in ("new", "engine"):
+            if args and args[0] not in ENGINES:
+                return f"error unknown engine {args[0]}"
+            if cmd == "engine" and not args:
+                return "error engine needs a name"
+            if args:
+                s.engine = args[0]
+            if cmd == "new":
+                s.moves, s.clock, s.increment = [], None, 0.0
+            return "ok"
+        if cmd == "position":
+            moves = "".join(args)
+            if not all(ch.isdigit() and int(ch) < COLS for ch in moves):
+                return "error bad move string"
+            err = _check_moves([int(ch) for ch in moves])
+            if err:
+                return "error " + err
+            s.moves = [int(ch) for ch in moves]
+            return "ok"
+        if cmd == "clock":
+            try:
+                s.clock = float(args[0]) / 1000
+                s.increment = float(args[1]) / 1000 if len(args) > 1 else 0.0
+            except (IndexError, ValueError):
+                return "error clock MS [INC_MS]"
+            return "ok"
+        if cmd == "go":
+            if _check_moves(s.moves, allow_over=False):
+                return "error game is over"
+            budget = None
+            if len(args) == 2 and args[0] == "movetime":
+                try:
+                    budget = max(MIN_BUDGET, float(args[1]) / 1000)
+                except ValueError:
+                    return "error go [movetime MS]"
+            elif args:
+                return "error go [movetime MS]"
+            s.stopped = False
+            s.task = asyncio.ensure_future(self._go(s, budget, writer))
+            return None
+        return f"error unknown command {cmd}"
+
+    def _stop(self, s):
+        s.stopped = True
+        if s.slot is not None:
+            self.flags[s.slot] = 1
+
+    async def _go(self, s, budget, writer):
+        uses_clock = budget is None and s.clock is not None
+        if budget is None:
+            budget = s.budget(self.movetime)
+        await self.slots.acquire()
+        slot = self.free_slots.pop()
+        self.flags[slot] = 1 if s.stopped else 0
+        s.slot = slot
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(
+            self.pool, _search, s.engine, s.moves[:], budget, slot, random.getrandbits(64))
+
+        def release(_):
+            # a cancelled task leaves the worker searching with this slot,
+            # so it only goes back once the search itself has returned
+            self.free_slots.append(slot)
+            self.slots.release()
+        fut.add_done_callback(release)
+        try:
+            move, elapsed, info = await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            self.flags[slot] = 1
+            raise
+        finally:
+            s.slot = None
+        if uses_clock:
+            s.clock = max(0.0, s.clock - elapsed) + s.increment
+        writer.write(f"info {info} time {int(elapsed * 1000)}\nbestmove {move}\n".encode())
+        await writer.drain()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _check_moves(moves, allow_over = True):
+    """Error text when moves are not a legal game (or the game is over)."""
+    from monte import BitboardGame
+    g = BitboardGame()
+    for i, c in enumerate(moves):
+        if g.terminal()[0]:
+            return f"game already over before move {i + 1}"
+        try:
+            g.play(c)
+        except ValueError:
+            return f"column {c} is full at move {i + 1}"
+    if not allow_over and g.terminal()[0]:
+        return "game is over"
+    return None
+
+
+async def serve(host = "127.0.0.1", port = 4440, unix = None, **kw):
+    engine = EngineServer(**kw)
+    if unix:
+        srv = await asyncio.start_unix_server(engine.handle, path=unix)
+    else:
+        srv = await asyncio.start_server(engine.handle, host, port)
+    where = unix or f"{host}:{port}"
+    print(f"engine server on {where}, {engine.workers} workers")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Connect-4 engine server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=4440)
+    ap.add_argument("--unix", default=None, help="serve on a Unix socket path instead")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-inflight", type=int, default=None)
+    ap.add_argument("--movetime", type=float, default=1.0, help="default seconds per move")
+    a = ap.parse_args()
+    try:
+        asyncio.run(serve(a.host, a.port, a.unix, workers=a.workers,
+                          max_inflight=a.max_inflight, movetime=a.movetime))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,173 @@
+"""
+solver.py  –  exact Connect-4 solver on the monte bitboard layout
+• negamax with null-window (MTD-style) search for the exact score
+• bounded transposition table, left-right mirror positions share entries
+• only non-losing moves are searched, found from threat bitmasks
+
+Scores are for the side to move: 0 is a draw, a positive score is a win
+with (ROWS*COLS + 1 - moves)//2 at the winning move, so faster wins
+score higher; a negative score is the mirror for a loss.
+"""
+
+from __future__ import annotations
+from array import array
+
+from geometry import STANDARD
+
+# the standard board only: the table holds 64-bit keys
+ROWS, COLS = STANDARD.rows, STANDARD.cols
+BITS_PER_COL = STANDARD.bits_per_col
+CENTER_ORDER = STANDARD.center_order
+BOTTOM_MASK, BOARD_MASK = STANDARD.bottom_mask, STANDARD.board_mask
+winning_cells = STANDARD.winning_cells
+
+SIZE = ROWS * COLS
+
+COLUMN_MASKS = [((1 << ROWS) - 1) << (c * BITS_PER_COL + 1) for c in range(COLS)]
+_mirror = STANDARD.mirror
+
+
+class Solver:
+    def __init__(self, tt_size = (1 << 21) + 7):
+        # a slot holds one key and a bound: value * 2 + (1 if lower bound)
+        self.tt_size = tt_size
+        self.keys = array("Q", bytes(8 * tt_size))
+        self.vals = array("b", bytes(tt_size))
+        self.nodes = 0
+
+    def reset(self):
+        self.keys = array("Q", bytes(8 * self.tt_size))
+        self.vals = array("b", bytes(self.tt_size))
+
+    def _store(self, key, value, lower):
+        i = key % self.tt_size
+        self.keys[i] = key
+        self.vals[i] = value * 2 + lower
+
+    def _negamax(self, cur, mask, moves, alpha, beta):
+        # the side to move has no immediate win here
+        self.nodes += 1
+        opp = cur ^ mask
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opp_win = winning_cells(opp, mask)
+        forced = possible & opp_win
+        if forced:
+            if forced & (forced - 1):
+                return -((SIZE - moves) // 2)        # two threats, cannot block both
+            possible = forced
+        possible &= ~(opp_win >> 1)                  # never play under a threat
+        if not possible:
+            return -((SIZE - moves) // 2)
+        if moves >= SIZE - 2:
+            return 0
+
+        lo = -((SIZE - 2 - moves) // 2)
+        if alpha < lo:
+            alpha = lo
+            if alpha >= beta:
+                return alpha
+        hi = (SIZE - 1 - moves) // 2
+
+        key = cur + mask + BOTTOM_MASK
+        mkey = _mirror(key)
+        if mkey < key:
+            key = mkey
+        i = key % self.tt_size
+        if self.keys[i] == key:
+            v = self.vals[i]
+            if v & 1:
+                lo = v >> 1
+                if alpha < lo:
+                    alpha = lo
+                    if alpha >= beta:
+                        return alpha
+            else:
+                hi = min(hi, v >> 1)
+        if beta > hi:
+            beta = hi
+            if alpha >= beta:
+                return beta
+
+        # most new threats first, center-first among equals
+        order = []
+        for c in CENTER_ORDER:
+            m = possible & COLUMN_MASKS[c]
+            if m:
+                order.append((-winning_cells(cur | m, mask).bit_count(), len(order), m))
+        order.sort()
+        for _, _, m in order:
+            score = -self._negamax(opp, mask | m, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self._store(key, score, True)
+                return score
+            if score > alpha:
+                alpha = score
+        self._store(key, alpha, False)
+        return alpha
+
+    def _root(self, g):
+        side = len(g.moves) & 1
+        cur = g.bb[side]
+        mask = g.bb[0] | g.bb[1]
+        return cur, mask, len(g.moves)
+
+    def solve(self, g):
+        """Exact score of g for the side to move."""
+        cur, mask, moves = self._root(g)
+        if winning_cells(cur, mask) & (mask + BOTTOM_MASK) & BOARD_MASK:
+            return (SIZE + 1 - moves) // 2
+        lo, hi = -((SIZE - moves) // 2), (SIZE + 1 - moves) // 2
+        while lo < hi:
+            med = lo + (hi - lo) // 2
+            if med <= 0 and int(lo / 2) < med:
+                med = int(lo / 2)
+            elif med >= 0 and hi // 2 > med:
+                med = hi // 2
+            r = self._negamax(cur, mask, moves, med, med + 1)
+            if r <= med:
+                hi = r
+            else:
+                lo = r
+        return lo
+
+    def best_move(self, g):
+        """(column, exact score) of a move that keeps g's exact score."""
+        cur, mask, moves = self._root(g)
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        win = winning_cells(cur, mask) & possible
+        if win:
+            for c in CENTER_ORDER:
+                if win & COLUMN_MASKS[c]:
+                    return c, (SIZE + 1 - moves) // 2
+        score = self.solve(g)
+        fallback = None
+        for c in CENTER_ORDER:
+            m = possible & COLUMN_MASKS[c]
+            if not m:
+                continue
+            if fallback is None:
+                fallback = c
+            if moves + 1 == SIZE:
+                return c, score
+            # does the child score at most -score for the opponent?
+            if winning_cells(cur ^ mask, mask | m) & ((mask | m) + BOTTOM_MASK) & BOARD_MASK:
+                continue                          # hands the opponent a win
+            r = self._negamax(cur ^ mask, mask | m, moves + 1, -score, -score + 1)
+            if r <= -score:
+                return c, score
+        return fallback, score
+
+
+_default: Solver | None = None
+
+
+def solve(position):
+    """Exact score of a monte.BitboardGame or connect_4_playing_ai.Position."""
+    global _default
+    if _default is None:
+        _default = Solver()
+    return _default.solve(position)
+
+
+def empty_cells(position):
+    return SIZE - len(position.moves)
@@ -0,0 +1,125 @@
+"""
+stats.py  –  per-search statistics shared by both engines
+• SearchStats: what one search did and where its time went
+• agents keep the latest in last_stats and pass it to an optional on_stats callback
+• SamplingProfiler: opt-in stack sampler for the searching thread; an agent
+  without one attached never touches it
+"""
+
+from __future__ import annotations
+import os, sys, threading
+from collections import Counter
+
+
+class SearchStats:
+    """Filled in by AlphaBetaAgent.search or MCTSAgent.search.
+
+    source says how the move was found: "search", "book", "solver" or
+    "tactic".  phases maps a phase name to seconds.  Fields that do not
+    apply to an engine stay None.
+    """
+    __slots__ = ("engine", "source", "move", "score", "elapsed", "phases",
+                 # alpha-beta
+                 "nodes", "cutoffs", "tt_hits", "tt_probes", "depth", "ebf",
+                 # MCTS
+                 "iterations", "rollouts", "tree_size", "max_depth", "children",
+                 "profile")
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.source = "search"
+        self.move = None
+        self.score = None
+        self.elapsed = 0.0
+        self.phases: dict[str, float] = {}
+        self.nodes = None
+        self.cutoffs = None
+        self.tt_hits = None
+        self.tt_probes = None
+        self.depth = None
+        self.ebf = None
+        self.iterations = None
+        self.rollouts = None
+        self.tree_size = None
+        self.max_depth = None
+        self.children: dict[int, tuple[int, float]] | None = None   # col -> (visits, Q)
+        self.profile: list[tuple[str, int]] | None = None           # (where, samples)
+
+    @property
+    def nodes_per_s(self):
+        return self.nodes / self.elapsed if self.nodes and self.elapsed else 0.0
+
+    @property
+    def rollouts_per_s(self):
+        return self.rollouts / self.elapsed if self.rollouts and self.elapsed else 0.0
+
+    def as_dict(self):
+        d = {k: getattr(self, k) for k in self.__slots__ if getattr(self, k) is not None}
+        if self.nodes:
+            d["nodes_per_s"] = round(self.nodes_per_s)
+        if self.rollouts:
+            d["rollouts_per_s"] = round(self.rollouts_per_s)
+        return d
+
+    def __str__(self):
+        parts = [f"{self.engine} {self.source} move {self.move}", f"time {self.elapsed * 1000:.0f}ms"]
+        if self.score is not None:
+            parts.append(f"score {self.score}")
+        if self.depth is not None:
+            parts.append(f"depth {self.depth}")
+        if self.nodes is not None:
+            parts.append(f"nodes {self.nodes} ({self.nodes_per_s:.0f}/s)")
+        if self.ebf is not None:
+            parts.append(f"ebf {self.ebf:.2f}")
+        if self.tt_probes:
+            parts.append(f"tt hits {self.tt_hits / self.tt_probes:.0%}")
+        if self.cutoffs is not None:
+            parts.append(f"cutoffs {self.cutoffs}")
+        if self.iterations is not None:
+            parts.append(f"iterations {self.iterations}")
+        if self.rollouts:
+            parts.append(f"rollouts {self.rollouts} ({self.rollouts_per_s:.0f}/s)")
+        if self.tree_size is not None:
+            parts.append(f"tree {self.tree_size} nodes, depth {self.max_depth}")
+        if self.phases:
+            parts.append(" ".join(f"{k} {v * 1000:.0f}ms" for k, v in self.phases.items()))
+        return "  ".join(parts)
+
+
+class SamplingProfiler:
+    """Counts where the searching thread is every interval seconds.
+
+    Attach one as agent.profiler; the agent calls start() and stop()
+    around each search and copies top() into its stats.
+    """
+
+    def __init__(self, interval = 0.002):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._target = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # samples the thread that calls start()
+        self.samples.clear()
+        self._target = threading.get_ident()
+        self._done.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                code = frame.f_code
+                self.samples[f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"] += 1
+
+    def top(self, n = 10):
+        return self.samples.most_common(n)
@@ -0,0 +1,25 @@
+"""Arena specs and scoring: a clearly stronger engine wins whichever side it plays."""
+import random
+
+import pytest
+
+from arena import parse_spec, play_game, random_opening
+
+STRONG, WEAK = "minimax:depth=6", "mcts:iterations=5"
+
+
+def test_score_follows_the_engine_for_both_opening_parities():
+    for plies in (3, 4):
+        opening = random_opening(random.Random(plies), plies)
+        for a_first in (True, False):
+            score = play_game(STRONG, WEAK, opening, a_first, 1)
+            assert score == 1.0, (plies, a_first)
+            # the same pairing with the specs reversed scores the other way
+            assert play_game(WEAK, STRONG, opening, not a_first, 1) == 1.0 - score
+
+
+def test_spec_keys_must_belong_to_the_engine():
+    assert parse_spec("mcts:iterations=3000,rave=300,c=0.7") == ("mcts", {"iterations": 3000, "rave": 300, "c": 0.7})
+    for bad in ("mcts:depth=3", "minimax:iterations=100", "mcts:iteration=3000"):
+        with pytest.raises(ValueError):
+            parse_spec(bad)
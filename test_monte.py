@@ -0,0 +1,45 @@
+"""MCTS playout policy: legal moves for both sides, threats respected when asked."""
+import random
+
+from geometry import get
+from monte import BitboardGame, MCTSAgent, random_policy
+
+
+def _positions(geo, count, seed):
+    rng = random.Random(seed)
+    while count:
+        g = BitboardGame(geo)
+        for _ in range(rng.randrange(geo.size)):
+            g.play(rng.choice(g.legal_moves()))
+            if g.terminal()[0]:
+                break
+        if not g.terminal()[0]:
+            count -= 1
+            yield g
+
+
+def test_random_policy_plays_legal_cells_for_both_sides():
+    rng = random.Random(0)
+    for geo in (get(), get(8, 9, 5)):
+        sides = set()
+        for g in _positions(geo, 300, 1):
+            sides.add(g.side_to_move)
+            mask = g.bb[0] | g.bb[1]
+            play = geo.playable(mask)
+            under = geo.winning_cells(g.bb[g.side_to_move ^ 1], mask) >> 1
+            safe = play & ~under
+            for _ in range(5):
+                assert random_policy(g, rng) in g.legal_moves()
+                col = random_policy(g, rng, avoid_threats=True)
+                assert col in g.legal_moves()
+                if safe:
+                    assert safe & geo.col_masks[col], (g.moves, col)
+        assert sides == {0, 1}
+
+
+def test_rollouts_finish_the_game():
+    for tactical in (False, True):
+        agent = MCTSAgent(time_limit=None, tactical=tactical, rng=random.Random(2))
+        for g in _positions(get(), 100, 3):
+            agent._rollout(g)
+            assert g.terminal()[0]
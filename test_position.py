@@ -0,0 +1,82 @@
+"""Position's bitboard rules and incremental score against the array functions."""
+import random
+
+import numpy as np
+
+from connect_4_playing_ai import (AI_PIECE, AlphaBetaAgent, Position, drop_piece, heuristic,
+                                  winning_move)
+from geometry import STANDARD, get
+
+
+def _check_random_games(geo, games, seed):
+    rng = random.Random(seed)
+    for _ in range(games):
+        pos = Position(geo)
+        board = np.zeros((geo.rows, geo.cols))
+        scores = [pos.score]
+        while True:
+            col = rng.choice(pos.valid_moves())
+            piece = pos.piece_to_move
+            after = board.copy()
+            drop_piece(after, col, piece)
+            assert pos.is_winning_move(col) == winning_move(after, piece, connect=geo.connect)
+            pos.play(col)
+            board = after
+            assert pos.score == heuristic(board, AI_PIECE, connect=geo.connect)
+            assert pos.last_move_won() == winning_move(board, piece, col, connect=geo.connect)
+            assert (pos.to_array() == board).all()
+            scores.append(pos.score)
+            if pos.last_move_won() or pos.is_full():
+                break
+        # undo restores every earlier score and the empty board
+        while pos.moves:
+            pos.undo()
+            scores.pop()
+            assert pos.score == scores[-1]
+        assert pos.bb == [0, 0] and not any(pos.codes)
+
+
+def test_standard_board_matches_array_functions():
+    _check_random_games(STANDARD, 60, 1)
+
+
+def test_other_geometries_match_array_functions():
+    for geo in (get(5, 6, 3), get(6, 8), get(7, 8, 5), get(8, 9, 4), get(10, 10, 5)):
+        _check_random_games(geo, 10, 2)
+
+
+def test_mirrored_positions_score_and_search_alike():
+    # the table shares an entry between a position and its mirror, so the
+    # evaluation must not tell them apart, on even widths too
+    for geo in (STANDARD, get(6, 8)):
+        rng = random.Random(4)
+        for _ in range(20):
+            pos, mirror = Position(geo), Position(geo)
+            for _ in range(rng.randrange(1, 12)):
+                col = rng.choice(pos.valid_moves())
+                pos.play(col)
+                mirror.play(geo.cols - 1 - col)
+                if pos.last_move_won():
+                    break
+            assert pos.score == mirror.score, pos.moves
+    geo = get(6, 8)
+    for moves in ([4, 0, 4], [2, 5, 1, 6]):
+        scores = []
+        for first in (moves, [geo.cols - 1 - c for c in moves]):
+            agent = AlphaBetaAgent(time_limit=None, max_depth=6)
+            for order in (first, [geo.cols - 1 - c for c in first]):
+                pos = Position(geo)
+                for col in order:
+                    pos.play(col)
+                agent.search(pos)
+                scores.append(agent.last_score)
+        assert len(set(scores)) == 1, (moves, scores)
+
+
+def test_from_array_round_trip():
+    rng = random.Random(3)
+    pos = Position()
+    for _ in range(20):
+        pos.play(rng.choice(pos.valid_moves()))
+    copy = Position.from_array(pos.to_array())
+    assert copy.bb == pos.bb and copy.score == pos.score and copy.key() == pos.key()
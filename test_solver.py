@@ -0,0 +1,60 @@
+"""solver.Solver against brute-force negamax on small endgames."""
+import random
+
+from monte import BitboardGame
+from solver import SIZE, Solver
+
+
+def _brute(g, memo):
+    """Exact solver-convention score of g for the side to move, by full search."""
+    key = (g.bb[0], g.bb[1])
+    if key in memo:
+        return memo[key]
+    moves = len(g.moves)
+    best = -SIZE
+    for col in g.legal_moves():
+        g.play(col)
+        over, winner = g.terminal()
+        if winner is not None:
+            score = (SIZE + 1 - moves) // 2
+        elif over:
+            score = 0
+        else:
+            score = -_brute(g, memo)
+        g.undo()
+        best = max(best, score)
+    memo[key] = best
+    return best
+
+
+def _endgames(count, seed, max_empty = 10):
+    rng = random.Random(seed)
+    while count:
+        g = BitboardGame()
+        empty = rng.randint(1, max_empty)
+        while len(g.moves) < SIZE - empty and not g.terminal()[0]:
+            g.play(rng.choice(g.legal_moves()))
+        if not g.terminal()[0]:
+            count -= 1
+            yield g
+
+
+def test_solve_matches_brute_force():
+    solver = Solver()
+    for g in _endgames(150, 13):
+        assert solver.solve(g) == _brute(g, {}), g.moves
+
+
+def test_best_move_keeps_the_score():
+    solver = Solver()
+    for g in _endgames(60, 14):
+        col, score = solver.best_move(g)
+        assert score == _brute(g, {})
+        g.play(col)
+        over, winner = g.terminal()
+        if winner is not None:
+            assert score == (SIZE + 2 - len(g.moves)) // 2
+        elif over:
+            assert score == 0
+        else:
+            assert -_brute(g, {}) == score
@@ -0,0 +1,122 @@
+"""
+tune.py  –  Texel-style tuning of the evaluation weights
+• features from heuristic.features for every position in self-play shards
+• fits P(win) = sigmoid(K * score) to the game outcomes: K first, with the
+  current weights, then the weights themselves by Newton steps
+• writes eval_weights.json, which connect_4_playing_ai loads at startup
+
+    python selfplay.py --games 20000 --out selfplay/
+    python tune.py selfplay/ --out eval_weights.json
+
+The tuned weights are in the same units as the current ones, so search
+windows and scores keep their scale; --scale multiplies them.  They are
+written as multiples of 1/64, which add and subtract exactly in floating
+point, so the incremental scores in Position never drift from a rescore.
+"""
+
+from __future__ import annotations
+import json, math
+
+import numpy as np
+
+import heuristic
+from connect_4_playing_ai import WEIGHTS_PATH, WINDOW_LENGTH, AI_PIECE
+from selfplay import iter_batches
+
+STEPS = 64          # weights are written in steps of 1/STEPS
+
+
+def load_dataset(path, min_ply = 0):
+    """(features for the side to move, results in [0, 1]) from self-play shards."""
+    xs, ys = [], []
+    for batch in iter_batches(path, 1 << 16):
+        batch = batch[batch["ply"] >= min_ply]
+        if not len(batch):
+            continue
+        boards = heuristic.boards_from_bitboards(batch["bb"])
+        x = heuristic.features(boards, AI_PIECE).astype(np.float64)
+        # features are for AI_PIECE (side 1); flip them where side 0 is to move
+        x[batch["side"] == 0] *= -1
+        xs.append(x)
+        ys.append((batch["outcome"].astype(np.float64) + 1) / 2)
+    if not xs:
+        raise ValueError(f"{path}: no positions")
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -50, 50)))
+
+
+def log_loss(x, y, w, k):
+    p = np.clip(_sigmoid(k * (x @ w)), 1e-12, 1 - 1e-12)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def fit_k(x, y, w, lo = 1e-4, hi = 2.0, steps = 60):
+    """Scale K minimising log_loss for fixed weights (golden-section on log K)."""
+    g = (math.sqrt(5) - 1) / 2
+    a, b = math.log(lo), math.log(hi)
+    for _ in range(steps):
+        c, d = b - g * (b - a), a + g * (b - a)
+        if log_loss(x, y, w, math.exp(c)) < log_loss(x, y, w, math.exp(d)):
+            b = d
+        else:
+            a = c
+    return math.exp((a + b) / 2)
+
+
+def fit_weights(x, y, w, k, ridge = 1e-4, iterations = 50):
+    """Weights minimising log_loss at scale k, by Newton steps from w."""
+    w = w.astype(np.float64).copy()
+    n = len(y)
+    for _ in range(iterations):
+        p = _sigmoid(k * (x @ w))
+        grad = k * x.T @ (p - y) / n + 2 * ridge * w
+        hess = k * k * (x.T * (p * (1 - p))) @ x / n + 2 * ridge * np.eye(len(w))
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < 1e-6:
+            break
+    return w
+
+
+def tune(path, min_ply = 0, holdout = 0.1, seed = 0):
+    x, y = load_dataset(path, min_ply)
+    rng = np.random.default_rng(seed)
+    test = rng.random(len(y)) < holdout
+    w0 = heuristic.weights().astype(np.float64)
+    k = fit_k(x[~test], y[~test], w0)
+    w = fit_weights(x[~test], y[~test], w0, k)
+    return {
+        "positions": len(y), "k": k, "weights": w,
+        "train_before": log_loss(x[~test], y[~test], w0, k), "train_after": log_loss(x[~test], y[~test], w, k),
+        "test_before": log_loss(x[test], y[test], w0, k), "test_after": log_loss(x[test], y[test], w, k),
+    }
+
+
+def write_weights(w, path = WEIGHTS_PATH, scale = 1.0):
+    w = [round(v * scale * STEPS) / STEPS for v in w]
+    with open(path, "w") as f:
+        json.dump({"window": w[:WINDOW_LENGTH - 1], "center": w[-1]}, f)
+        f.write("\n")
+    return w
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="fit the evaluation weights to self-play outcomes")
+    ap.add_argument("data", help="self-play shard directory or file")
+    ap.add_argument("--out", default=WEIGHTS_PATH)
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply the weights before writing them")
+    ap.add_argument("--min-ply", type=int, default=0, help="skip positions before this ply")
+    a = ap.parse_args()
+    r = tune(a.data, a.min_ply)
+    names = [f"window{n}" for n in range(1, WINDOW_LENGTH)] + ["center"]
+    print(f"{r['positions']} positions, K = {r['k']:.4f}")
+    for name, old, new in zip(names, heuristic.weights(), r["weights"]):
+        print(f"  {name:8} {old:6} -> {new:8.3f}")
+    print(f"log loss  train {r['train_before']:.4f} -> {r['train_after']:.4f}"
+          f"  held out {r['test_before']:.4f} -> {r['test_after']:.4f}")
+    w = write_weights(r["weights"], a.out, a.scale)
+    print(f"wrote {w} to {a.out}")